@@ -0,0 +1,110 @@
+# benchmark_country_rows.py
+
+import inspect
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from cases_death_analysis import CasesDeathAnalysis
+from data_store import DATASETS, DataStore, country_rows, get_data_store, row_index
+from excess_mortality_analysis import ExcessMortalityAnalysis
+from mobility_analysis import MobilityAnalysis
+from policy_analysis import PolicyAnalysis
+from testing_healthcare_analysis import TestingHealthcareAnalysis
+from vaccination_analysis import VaccinationAnalysis
+
+# Compares country extraction through row_index with the boolean masks it replaced, on the
+# cleaned datasets. Usage: python benchmark_country_rows.py [data_dir] [scale] [country]
+
+ANALYSES = [CasesDeathAnalysis, ExcessMortalityAnalysis, MobilityAnalysis, PolicyAnalysis,
+            TestingHealthcareAnalysis, VaccinationAnalysis]
+
+
+def scaled(data, scale):
+    """
+    Returns data with every country repeated scale times under new names, still grouped by country.
+    """
+    copies = [data.assign(country=data['country'].astype(str) + f' #{copy}') for copy in range(scale)]
+    data = pd.concat(copies, ignore_index=True).sort_values('country', kind='stable', ignore_index=True)
+    return data.assign(country=data['country'].astype('category'))
+
+
+def benchmark_extraction(scale=60, samples=40, repeat=5):
+    """
+    Prints, for every dataset keyed by country, the mean time to take one
+    country's rows with a mask and with country_rows, and the time to build
+    the index once.
+    """
+    store = get_data_store()
+    for name, dataset in DATASETS.items():
+        if 'country' not in dataset['keys']:
+            continue
+        data = scaled(store.get(name), scale)
+        start = time.perf_counter()
+        row_index(data)
+        build = time.perf_counter() - start
+
+        countries = np.random.default_rng(0).choice(data['country'].cat.categories, samples, replace=False)
+        timings = {}
+        for method, extract in (('mask', lambda country: data[data['country'] == country]),
+                                ('slice', lambda country: country_rows(data, country))):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for country in countries:
+                    extract(country)
+            timings[method] = (time.perf_counter() - start) / (repeat * samples)
+        print(f"{name:28s} {len(data):>9} rows  mask {timings['mask'] * 1e3:6.2f} ms  "
+              f"slice {timings['slice'] * 1e3:6.2f} ms  index {build * 1e3:6.2f} ms")
+
+
+def per_country_calls(country):
+    """
+    Returns a function per plot method taking a country, each calling it for the given country.
+    """
+    calls = []
+    for analysis in ANALYSES:
+        instance = analysis()
+        for method_name, method in inspect.getmembers(instance, inspect.ismethod):
+            if method_name.startswith('plot_') and 'country' in inspect.signature(method).parameters:
+                calls.append((f'{analysis.__name__}.{method_name}', lambda method=method: method(country=country)))
+    return calls
+
+
+def benchmark_calls(country='Argentina', repeat=3):
+    """
+    Prints the total time of the per-country dashboard calls with masks
+    (row_index disabled, as before the index) and with the index.
+    """
+    calls = per_country_calls(country)
+    working = []
+    for label, call in calls:
+        try:
+            call()
+            working.append(call)
+        except (ValueError, KeyError) as error:
+            print(f"skipped {label}: {error}")
+
+    totals = {}
+    for method, index in (('mask', lambda data, column='country': None), ('index', row_index)):
+        data_store.row_index = index
+        try:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for call in working:
+                    call()
+            totals[method] = (time.perf_counter() - start) / repeat
+        finally:
+            data_store.row_index = row_index
+    print(f"{len(working)} per-country calls: mask {totals['mask']:.2f} s, index {totals['index']:.2f} s")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args:
+        # Benchmark another folder of cleaned datasets than the configured one
+        data_store._data_store = DataStore(args[0])
+    benchmark_extraction(int(args[1]) if len(args) > 1 else 60)
+    benchmark_calls(args[2] if len(args) > 2 else 'Argentina')
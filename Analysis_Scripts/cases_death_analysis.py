@@ -1,39 +1,36 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import LazyDataset, all_columns, country_rows, country_summary, fact_rows, label_units, prepare
 
 
 class CasesDeathAnalysis:
-    def __init__(self):
+    cases_deaths = LazyDataset('cases_deaths')
+    reproduction_rate = LazyDataset('reproduction_rate')
+    country_daily = LazyDataset('country_daily')
+
+    def __init__(self, metrics=None):
         """
-        Initialize the CaseDeathAnalysis class with the file path.
+        Initialize the CaseDeathAnalysis class with the metrics it will plot.
         """
-        cases_deaths_file = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-        government_response_file = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv'
-        reproduction_rate_file = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\reproduction_rate_cleaned.csv'
-        testing_file = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\testing_cleaned.csv'
-
-        self.cases_deaths = pd.read_csv(cases_deaths_file)
-        self.government_response = pd.read_csv(government_response_file)
-        self.reproduction_rate = pd.read_csv(reproduction_rate_file)
-        self.testing = pd.read_csv(testing_file)
-
-        # Convert date columns to datetime
-        self.cases_deaths['date'] = pd.to_datetime(self.cases_deaths['date'])
-        self.government_response['date'] = pd.to_datetime(self.government_response['date'])
-        self.reproduction_rate['date'] = pd.to_datetime(self.reproduction_rate['date'])
-        self.testing['date'] = pd.to_datetime(self.testing['date'])
+        self.metrics = metrics
 
     # Data Processing Method
-    def _process_cfr_data(self):
+    def _process_cfr_data(self, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for Case Fatality Rate (CFR) analysis.
         """
-        # Group by 'country' and calculate the latest CFR
-        cfr_data = self.cases_deaths.groupby('country').apply(
-            lambda x: (x['total_deaths'].max() / x['total_cases'].max()) * 100 if x['total_cases'].max() != 0 else 0
-        ).reset_index(name='cfr')
+        # Group by 'country' and calculate the latest CFR, a ratio, so from the counts as stored
+        # (a conversion would only lose the countries without a population)
+        summary = country_summary(prepare(self.cases_deaths, interval), start_date, end_date,
+                                  columns=['total_cases', 'total_deaths'])
+        total_cases = summary['total_cases_max']
+        cfr_data = pd.DataFrame({
+            'country': summary['country'],
+            'cfr': np.where(total_cases != 0, summary['total_deaths_max'] / total_cases * 100, 0)
+        })
 
         return cfr_data
 
@@ -68,11 +65,12 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_cfr(self, visualization_type='chart'):
+    def plot_cfr(self, visualization_type='chart', start_date=None, end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for CFR analysis.
         """
-        data = self._process_cfr_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_cfr_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_cfr_chart(data)
@@ -83,14 +81,15 @@ class CasesDeathAnalysis:
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        # Wrap the Plotly figure in a dcc.Graph component
+        # Wrap the Plotly figure in a dcc.Graph component (CFR is a ratio, no population unit to label)
         return dcc.Graph(figure=fig)
 
-    def _process_weekly_biweekly_growth_data(self, country):
+    def _process_weekly_biweekly_growth_data(self, country, start_date=None, end_date=None, interval='daily',
+                                             population=None):
         """
         Process data for weekly/biweekly growth analysis.
         """
-        country_data = self.cases_deaths[self.cases_deaths['country'] == country]
+        country_data = country_rows(prepare(self.cases_deaths, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -111,7 +110,7 @@ class CasesDeathAnalysis:
         Generate a map for weekly/biweekly growth analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'weekly_pct_growth_cases': 'mean',
             'biweekly_pct_growth_cases': 'mean',
             'weekly_pct_growth_deaths': 'mean',
@@ -137,31 +136,35 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_weekly_biweekly_growth(self, country, visualization_type='chart'):
+    def plot_weekly_biweekly_growth(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                    interval='daily', population=None):
         """
         Generate the specified visualization for weekly/biweekly growth analysis.
         """
-        data = self._process_weekly_biweekly_growth_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_weekly_biweekly_growth_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_weekly_biweekly_growth_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_weekly_biweekly_growth_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_weekly_biweekly_growth_table(data)
+            return label_units(self._plot_weekly_biweekly_growth_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart' or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_cases_deaths_per_million_data(self):
+    def _process_cases_deaths_per_million_data(self, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for cases/deaths per million analysis.
         """
-        cases_deaths_per_million = self.cases_deaths.groupby('country').agg({
-            'new_cases_per_million': 'max',
-            'new_deaths_per_million': 'max'
-        }).reset_index()
+        summary = country_summary(prepare(self.cases_deaths, interval, population), start_date, end_date,
+                                  columns=['new_cases_per_million', 'new_deaths_per_million'])
+        cases_deaths_per_million = summary[
+            ['country', 'new_cases_per_million_max', 'new_deaths_per_million_max']].rename(columns={
+                'new_cases_per_million_max': 'new_cases_per_million',
+                'new_deaths_per_million_max': 'new_deaths_per_million'})
         return cases_deaths_per_million
 
     def _plot_cases_deaths_per_million_chart(self, data):
@@ -197,33 +200,34 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_cases_deaths_per_million(self, visualization_type='chart'):
+    def plot_cases_deaths_per_million(self, visualization_type='chart', start_date=None, end_date=None,
+                                      interval='daily', population=None):
         """
         Generate the specified visualization for cases/deaths per million analysis.
         """
-        data = self._process_cases_deaths_per_million_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_cases_deaths_per_million_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_cases_deaths_per_million_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_cases_deaths_per_million_map(data)
         elif visualization_type == 'table':
-            return self._plot_cases_deaths_per_million_table(data)
+            return label_units(self._plot_cases_deaths_per_million_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart' or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_impact_data(self, country):
+    def _process_policy_impact_data(self, country, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for policy impact analysis.
         """
-        merged_data = pd.merge(
-            self.cases_deaths,
-            self.government_response,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_daily = prepare(self.country_daily, interval, population)
+        country_data = fact_rows(country_daily, ['cases_deaths', 'government_response'], [
+            'country', 'date', 'new_cases_per_million', 'new_deaths_per_million', 'stringency_index'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -243,7 +247,7 @@ class CasesDeathAnalysis:
         Generate a map for policy impact analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_cases_per_million': 'mean',
             'new_deaths_per_million': 'mean'
         }).reset_index()
@@ -267,28 +271,32 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_policy_impact(self, country, visualization_type='chart'):
+    def plot_policy_impact(self, country, visualization_type='chart', start_date=None, end_date=None, interval='daily',
+                           population=None):
         """
         Generate the specified visualization for policy impact analysis.
         """
-        data = self._process_policy_impact_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_impact_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_impact_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_impact_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_impact_table(data)
+            return label_units(self._plot_policy_impact_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart' or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_reproduction_rate_trends_data(self, country):
+    def _process_reproduction_rate_trends_data(self, country, start_date=None, end_date=None, interval='daily',
+                                               population=None):
         """
         Process data for reproduction rate trends analysis.
         """
-        country_data = self.reproduction_rate[self.reproduction_rate['country'] == country]
+        reproduction_rate = prepare(self.reproduction_rate, interval, population)
+        country_data = country_rows(reproduction_rate, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -314,7 +322,7 @@ class CasesDeathAnalysis:
         Generate a map for reproduction rate trends analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'r': 'mean',
             'ci_95_l': 'mean',
             'ci_95_u': 'mean'
@@ -339,33 +347,34 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_reproduction_rate_trends(self, country, visualization_type='chart'):
+    def plot_reproduction_rate_trends(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                      interval='daily', population=None):
         """
         Generate the specified visualization for reproduction rate trends analysis.
         """
-        data = self._process_reproduction_rate_trends_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_reproduction_rate_trends_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_reproduction_rate_trends_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_reproduction_rate_trends_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_reproduction_rate_trends_table(data)
+            return label_units(self._plot_reproduction_rate_trends_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_testing_vs_case_detection_data(self, country):
+    def _process_testing_vs_case_detection_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                population=None):
         """
         Process data for testing vs. case detection analysis.
         """
-        merge_data = pd.merge(
-            self.testing,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merge_data[merge_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_data = fact_rows(prepare(self.country_daily, interval, population), ['testing', 'cases_deaths'], [
+            'country', 'date', 'new_tests_per_thousand', 'new_cases_per_million'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -386,7 +395,7 @@ class CasesDeathAnalysis:
         Generate a map for testing vs. case detection analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_tests_per_thousand': 'mean',
             'new_cases_per_million': 'mean'
         }).reset_index()
@@ -410,28 +419,30 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_testing_vs_case_detection(self, country, visualization_type='chart'):
+    def plot_testing_vs_case_detection(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                       interval='daily', population=None):
         """
         Generate the specified visualization for testing vs. case detection analysis.
         """
-        data = self._process_testing_vs_case_detection_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_testing_vs_case_detection_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_testing_vs_case_detection_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_testing_vs_case_detection_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_testing_vs_case_detection_table(data)
+            return label_units(self._plot_testing_vs_case_detection_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_case_trends_data(self, country):
+    def _process_case_trends_data(self, country, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for case trends analysis.
         """
-        country_data = self.cases_deaths[self.cases_deaths['country'] == country]
+        country_data = country_rows(prepare(self.cases_deaths, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -451,7 +462,7 @@ class CasesDeathAnalysis:
         Generate a map for case trends analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_cases': 'mean',
             'total_cases': 'mean'
         }).reset_index()
@@ -475,28 +486,30 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_case_trends(self, country, visualization_type='chart'):
+    def plot_case_trends(self, country, visualization_type='chart', start_date=None, end_date=None, interval='daily',
+                         population=None):
         """
         Generate the specified visualization for case trends analysis.
         """
-        data = self._process_case_trends_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_case_trends_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_case_trends_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_case_trends_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_case_trends_table(data)
+            return label_units(self._plot_case_trends_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_death_trends_data(self, country):
+    def _process_death_trends_data(self, country, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for death trends analysis.
         """
-        country_data = self.cases_deaths[self.cases_deaths['country'] == country]
+        country_data = country_rows(prepare(self.cases_deaths, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -516,7 +529,7 @@ class CasesDeathAnalysis:
         Generate a map for death trends analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_deaths': 'mean',
             'total_deaths': 'mean'
         }).reset_index()
@@ -540,28 +553,30 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_death_trends(self, country, visualization_type='chart'):
+    def plot_death_trends(self, country, visualization_type='chart', start_date=None, end_date=None, interval='daily',
+                          population=None):
         """
         Generate the specified visualization for death trends analysis.
         """
-        data = self._process_death_trends_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_death_trends_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_death_trends_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_death_trends_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_death_trends_table(data)
+            return label_units(self._plot_death_trends_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_cfr_data_by_country(self, country):
+    def _process_cfr_data_by_country(self, country, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for CFR over time analysis.
         """
-        country_data = self.cases_deaths[self.cases_deaths['country'] == country]
+        country_data = country_rows(prepare(self.cases_deaths, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -581,7 +596,7 @@ class CasesDeathAnalysis:
         Generate a map for CFR over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'cfr': 'mean'
         }).reset_index()
 
@@ -604,22 +619,24 @@ class CasesDeathAnalysis:
         )
         return table
 
-    def plot_cfr_by_country(self, country, visualization_type='chart'):
+    def plot_cfr_by_country(self, country, visualization_type='chart', start_date=None, end_date=None, interval='daily',
+                            population=None):
         """
         Generate the specified visualization for CFR over time analysis.
         """
-        data = self._process_cfr_data_by_country(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_cfr_data_by_country(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_cfr_by_country_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_cfr_by_country_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_cfr_by_country_table(data)
+            return label_units(self._plot_cfr_by_country_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,895 @@
+# data_store.py
+
+import contextlib
+import fnmatch
+import json
+import os
+import re
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from dataset_manifest import DATASETS, required_columns
+
+# Folder holding the outputs of the data_cleaning_scripts
+CLEANED_DATA_DIR = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data'
+
+# Cleaned file (without extension) behind every dataset the analysis classes use
+DATASET_FILES = {name: spec['file'] for name, spec in DATASETS.items()}
+
+# Column names fixed up at load time (the cleaned excess mortality file uses 'entity')
+COLUMN_RENAMES = {'entity': 'country'}
+
+# Parquet metadata key holding the partition index written by data_cleaner.save_dataset
+PARTITION_INDEX_KEY = b'partition_index'
+
+# Parquet metadata key holding the data version written by data_cleaning_scripts/clean_all.py
+DATA_VERSION_KEY = b'data_version'
+
+# Key columns kept as categoricals (Parquet files already store them that way)
+CATEGORY_COLUMNS = ['country', 'place', 'age_group', 'vaccine', 'state', 'country_code']
+
+# Pandas period of every interval served by rollup (daily rows are served as they are)
+ROLLUP_PERIODS = {'weekly': 'W', 'monthly': 'M'}
+
+# How rollup aggregates a column, by name pattern (first match wins, anything else is averaged):
+# rolling windows are averaged, daily counts summed and cumulative counts take their last value
+ROLLUP_RULES = [
+    ('*7_day_avg*', 'mean'), ('*7day_smoothed*', 'mean'), ('weekly_*', 'mean'), ('biweekly_*', 'mean'),
+    ('new_*', 'sum'), ('daily_vaccinations*', 'sum'), ('excess_proj_all_ages', 'sum'),
+    ('excess_per_million_proj_all_ages', 'sum'), ('average_deaths_2015_2019_all_ages', 'sum'),
+    ('total_*', 'last'), ('cum_*', 'last'), ('people_*', 'last'), ('*_since_*', 'last'),
+    ('distributed_per_hundred', 'last'), ('share_doses_used', 'last'), ('has_*', 'max'),
+]
+
+# Units normalize converts counts to, with the number of people per unit (None for totals)
+POPULATION_UNITS = {'total': None, 'per_thousand': 1e3, 'per_100k': 1e5, 'per_million': 1e6}
+
+# Unit every count column is stored in, by name pattern (first match wins, None for columns that
+# are not counts); other columns (rates, indexes, shares of the population such as *_per_hundred)
+# are not counts either
+COUNT_UNIT_RULES = [
+    ('days_since_*', None), ('*_per_million*', 'per_million'), ('*_per_1m', 'per_million'), ('*_per_100k*', 'per_100k'),
+    ('*_per_thousand*', 'per_thousand'),
+    ('new_cases', 'total'), ('new_deaths', 'total'), ('total_cases', 'total'), ('total_deaths', 'total'),
+    ('weekly_cases', 'total'), ('weekly_deaths', 'total'), ('biweekly_cases', 'total'), ('biweekly_deaths', 'total'),
+    ('new_*_7_day_avg_right', 'total'), ('total_deaths_last12m', 'total'), ('total_tests', 'total'),
+    ('new_tests*', 'total'), ('daily_occupancy_*', 'total'), ('weekly_admissions_*', 'total'),
+    ('*excess_proj_all_ages', 'total'), ('*deaths*all_ages', 'total'), ('total_vaccinations', 'total'),
+]
+
+# Statistics country_summary keeps for every numeric column, in column order
+SUMMARY_STATISTICS = ['max', 'last', 'mean', 'sum']
+
+# Count and per capita columns the population of every country is derived from, by dataset
+# (the first dataset with both columns for a country wins)
+POPULATION_SOURCES = {
+    'cases_deaths': [('total_cases', 'total_cases_per_million'), ('total_deaths', 'total_deaths_per_million')],
+    'testing': [('total_tests', 'total_tests_per_thousand')],
+    'hospital': [('daily_occupancy_hosp', 'daily_occupancy_hosp_per_1m')],
+}
+
+
+class DataStore:
+    def __init__(self, data_dir=CLEANED_DATA_DIR, memory_map=True):
+        """
+        Initialize the DataStore with the folder of cleaned datasets. The frames it
+        hands out are shared and read-only (use .copy() or .assign() before changing them).
+
+        Parameters:
+            data_dir (str): Folder containing the cleaned files.
+            memory_map (bool): Serve Parquet datasets through memory-mapped Arrow files.
+        """
+        self.data_dir = data_dir
+        self.memory_map = memory_map
+        # Per dataset: {column: Series} of every column read so far, never handed out as a frame
+        self._datasets = {}
+        # Frames handed out by get, per (dataset, requested columns)
+        self._frames = {}
+        self._lock = threading.Lock()
+
+        # Seconds spent parsing date strings per dataset; stays empty when every file stores datetime64 dates
+        self.date_parse_seconds = {}
+
+        # Per dataset: columns held out of the file's columns, rows, number of file reads and seconds spent reading
+        self.load_stats = {}
+
+    def get(self, name, columns=None):
+        """
+        Return the shared DataFrame for a dataset with the requested columns, in
+        that order, reading the ones not read yet from disk.
+
+        Parameters:
+            name (str): Dataset name, one of DATASET_FILES.
+            columns (list): Columns needed by the caller, or None for all columns.
+
+        Returns:
+            pd.DataFrame: The loaded dataset.
+        """
+        if name not in DATASET_FILES:
+            raise ValueError(f"Unknown dataset '{name}'. Choose one of {sorted(DATASET_FILES)}.")
+
+        with self._lock:
+            if columns is None:
+                columns = list(self._file_columns(name))
+            key = (name, tuple(columns))
+            data = self._frames.get(key)
+            if data is not None:
+                return data
+
+            loaded = self._datasets.setdefault(name, {})
+            missing = [col for col in dict.fromkeys(columns) if col not in loaded]
+            if missing:
+                # Rows come back in file order, so the new columns line up with the ones already read
+                extra = self._timed_load(name, missing)
+                loaded.update((col, extra[col]) for col in missing)
+                self.load_stats[name]['columns'] = len(loaded)
+
+            # copy=False keeps one copy of every column (and its memory map) however many frames hold it
+            data = pd.DataFrame({col: loaded[col] for col in columns}, copy=False)
+            self._frames[key] = data
+            return data
+
+    def read(self, name, columns):
+        """
+        Read columns of a dataset from disk without caching them.
+        """
+        if name not in DATASET_FILES:
+            raise ValueError(f"Unknown dataset '{name}'. Choose one of {sorted(DATASET_FILES)}.")
+        with self._lock:
+            return self._timed_load(name, list(dict.fromkeys(columns)))
+
+    def is_loaded(self, name):
+        """
+        Return True once a dataset has been read from disk.
+        """
+        return bool(self._datasets.get(name))
+
+    def _timed_load(self, name, columns):
+        """
+        Run _load and add the read to the dataset's load_stats.
+        """
+        start = time.perf_counter()
+        data = self._load(name, columns)
+        stats = self.load_stats.setdefault(
+            name, {'columns': 0, 'file_columns': len(self._file_columns(name)), 'rows': 0, 'reads': 0, 'seconds': 0.0})
+        stats['rows'] = len(data)
+        stats['reads'] += 1
+        stats['seconds'] += time.perf_counter() - start
+        return data
+
+    def _path(self, name):
+        """
+        Return the cleaned file for a dataset, preferring Arrow, then Parquet, then CSV.
+        """
+        base_path = os.path.join(self.data_dir, DATASET_FILES[name])
+        if os.path.exists(base_path + '.parquet'):
+            if self.memory_map:
+                return self._publish_arrow(base_path)
+            return base_path + '.parquet'
+        return base_path + '.csv'
+
+    def _publish_arrow(self, base_path):
+        """
+        Return the Arrow IPC copy of a Parquet file, writing it when missing or older than the Parquet file.
+        """
+        parquet_path = base_path + '.parquet'
+        arrow_path = base_path + '.arrow'
+        if os.path.exists(arrow_path) and os.path.getmtime(arrow_path) >= os.path.getmtime(parquet_path):
+            return arrow_path
+
+        # One chunk per column so pandas can use each buffer as is
+        table = pq.read_table(parquet_path).combine_chunks()
+        table = table.replace_schema_metadata(parquet_schema(parquet_path).metadata)
+
+        # Store float gaps as NaN instead of nulls; a null bitmap would force pandas to copy the column
+        for i, field in enumerate(table.schema):
+            if pa.types.is_floating(field.type) and table.column(i).null_count:
+                table = table.set_column(i, field, pc.fill_null(table.column(i), float('nan')))
+
+        # Write to a private file first so other processes never map a half-written file
+        tmp_path = f'{arrow_path}.{os.getpid()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        try:
+            os.replace(tmp_path, arrow_path)
+        except OSError:
+            # Windows refuses to replace a file another process still has mapped
+            os.remove(tmp_path)
+            return parquet_path
+        return arrow_path
+
+    def _file_schema(self, name):
+        """
+        Return the Arrow schema of a dataset's Arrow or Parquet file, or None for CSV files.
+        """
+        path = self._path(name)
+        if path.endswith('.arrow'):
+            return pa.ipc.open_file(pa.memory_map(path)).schema
+        if path.endswith('.parquet'):
+            return parquet_schema(path)
+        return None
+
+    def _file_columns(self, name):
+        """
+        Return the file's header as {name after load fixes: name in the file}.
+        """
+        schema = self._file_schema(name)
+        if schema is not None:
+            file_columns = schema.names
+        else:
+            file_columns = pd.read_csv(self._path(name), nrows=0).columns.tolist()
+
+        # Some files carry padded headers (e.g. hospital) or use 'entity' for the country
+        return {COLUMN_RENAMES.get(col.strip(), col.strip()): col for col in file_columns}
+
+    def partition_index(self, name):
+        """
+        Return the partition index of a dataset as (key column, {key: (first row, end row, row group)}),
+        or None when its file is not partitioned.
+        """
+        schema = self._file_schema(name)
+        if schema is None or not schema.metadata or PARTITION_INDEX_KEY not in schema.metadata:
+            return None
+        index = json.loads(schema.metadata[PARTITION_INDEX_KEY])
+        partitions = {key: tuple(bounds) for key, bounds in index['partitions'].items()}
+        return COLUMN_RENAMES.get(index['column'], index['column']), partitions
+
+    def data_version(self, name):
+        """
+        Return the data version of a dataset, a hash of its raw file and cleaning
+        spec that changes whenever the cleaned file does, or None for files
+        cleaned without one (e.g. CSV files). Caches of results computed from a
+        dataset can key on it.
+        """
+        schema = self._file_schema(name)
+        if schema is None or not schema.metadata or DATA_VERSION_KEY not in schema.metadata:
+            return None
+        return schema.metadata[DATA_VERSION_KEY].decode()
+
+    def get_partition(self, name, key, columns=None):
+        """
+        Return the rows of one country (or state) of a dataset, reading only that
+        partition. The result is not cached.
+
+        Parameters:
+            name (str): Dataset name, one of DATASET_FILES.
+            key (str): Country (or state) to read.
+            columns (list): Columns to read, or None for all columns.
+
+        Returns:
+            pd.DataFrame: The partition's rows, empty when the dataset has no rows for the key.
+        """
+        if name not in DATASET_FILES:
+            raise ValueError(f"Unknown dataset '{name}'. Choose one of {sorted(DATASET_FILES)}.")
+        if columns is None:
+            columns = list(self._file_columns(name))
+
+        index = self.partition_index(name)
+        if index is None:
+            key_column = 'state' if 'state' in self._file_columns(name) else 'country'
+            data = self.get(name, columns=list(dict.fromkeys(columns + [key_column])))
+            return data.loc[data[key_column] == key, columns].reset_index(drop=True)
+
+        # Keys missing from the index read an empty row range
+        start, stop, row_group = index[1].get(key, (0, 0, None))
+        return self._load(name, columns, partition=(start, stop, row_group))
+
+    def iter_partitions(self, name, columns=None):
+        """
+        Yield (country, DataFrame) for every partition of a dataset, one partition in memory at a time.
+        """
+        index = self.partition_index(name)
+        if index is None:
+            raise ValueError(f"Dataset '{name}' has no partition index; re-run its cleaning script.")
+        for key in index[1]:
+            yield key, self.get_partition(name, key, columns=columns)
+
+    def _load(self, name, columns, partition=None):
+        """
+        Read some columns of a cleaned file (or of one partition, given as
+        (first row, end row, row group)) and apply the fixes every analysis class expects.
+        """
+        path = self._path(name)
+        file_columns = self._file_columns(name)
+        unknown = [col for col in columns if col not in file_columns]
+        if unknown:
+            raise ValueError(f"Columns {unknown} not found in dataset '{name}'.")
+        usecols = [file_columns[col] for col in columns]
+
+        if path.endswith('.arrow'):
+            # The map stays open for as long as the returned columns reference it
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all().select(usecols)
+            if partition is not None:
+                table = table.slice(partition[0], partition[1] - partition[0])
+            data = table.to_pandas(split_blocks=True)
+        elif path.endswith('.parquet'):
+            if partition is None:
+                data = pd.read_parquet(path, columns=usecols)
+            elif partition[2] is None:
+                data = pq.read_schema(path).empty_table().select(usecols).to_pandas()
+            else:
+                data = pq.ParquetFile(path).read_row_group(partition[2], columns=usecols).to_pandas()
+        else:
+            data = pd.read_csv(path, usecols=usecols)[usecols]
+        data.columns = list(columns)
+
+        if path.endswith('.csv'):
+            # CSV files predate the compact dtype plan applied by data_cleaner.save_dataset
+            data = compact_dtypes(data)
+
+        # Parquet and Arrow files store datetime64 dates; only CSV files still need parsing
+        if 'date' in data.columns and not pd.api.types.is_datetime64_any_dtype(data['date']):
+            start = time.perf_counter()
+            data['date'] = pd.to_datetime(data['date'])
+            self.date_parse_seconds[name] = self.date_parse_seconds.get(name, 0.0) + time.perf_counter() - start
+        return data
+
+    def _stores_native_dates(self, name):
+        """
+        Return True when a dataset's file stores 'date' as a timestamp (or has no date column),
+        or None when the dataset has no cleaned file yet. Only the Parquet footer (or the CSV
+        header) is read, and no Arrow copy is published.
+        """
+        base_path = os.path.join(self.data_dir, DATASET_FILES[name])
+        if os.path.exists(base_path + '.parquet'):
+            schema = pq.read_schema(base_path + '.parquet')
+            return 'date' not in schema.names or pa.types.is_timestamp(schema.field('date').type)
+        if os.path.exists(base_path + '.csv'):
+            return 'date' not in [col.strip() for col in pd.read_csv(base_path + '.csv', nrows=0).columns]
+        return None
+
+    def date_parsing_report(self):
+        """
+        Return a short report on the datasets whose files store dates as strings,
+        the time spent parsing them and the datasets without a cleaned file.
+        """
+        native = {name: self._stores_native_dates(name) for name in DATASET_FILES}
+        text_dates = [name for name, stores_dates in native.items() if stores_dates is False]
+        missing = [name for name, stores_dates in native.items() if stores_dates is None]
+
+        if not text_dates and not self.date_parse_seconds:
+            lines = ['Date parsing: none, every dataset stores datetime64 dates.']
+        else:
+            lines = [f"Date parsing: {len(text_dates)} dataset(s) store dates as text: {', '.join(text_dates)}"]
+            for name, seconds in sorted(self.date_parse_seconds.items()):
+                lines.append(f'  {name}: {seconds:.3f}s spent parsing dates')
+        if missing:
+            lines.append(f"Missing cleaned files: {', '.join(DATASET_FILES[name] for name in missing)}")
+        return '\n'.join(lines)
+
+
+def parquet_schema(path):
+    """
+    Return the Arrow schema of a Parquet file, with the partition index and
+    data version added when they are only in the file footer
+    (data_cleaner.clean_dataset_chunked writes them there, once every row group is written).
+    """
+    schema = pq.read_schema(path)
+    metadata = dict(schema.metadata or {})
+    footer = pq.read_metadata(path).metadata or {}
+    missing = {key: footer[key] for key in (PARTITION_INDEX_KEY, DATA_VERSION_KEY)
+               if key in footer and key not in metadata}
+    if missing:
+        schema = schema.with_metadata({**metadata, **missing})
+    return schema
+
+
+def compact_dtypes(data):
+    """
+    Convert a frame read from CSV to the dtypes the cleaning scripts store in
+    Parquet: categorical keys, and the smallest integer type (or float32 when
+    it keeps 6 significant digits) for numeric columns.
+    """
+    compact = {}
+    for col in data.columns:
+        values = data[col]
+        if col in CATEGORY_COLUMNS:
+            compact[col] = values.astype('category')
+        elif pd.api.types.is_float_dtype(values.dtype) or pd.api.types.is_integer_dtype(values.dtype):
+            array = values.to_numpy(dtype='float64')
+            if not np.isnan(array).any() and np.array_equal(array, np.round(array)):
+                compact[col] = pd.to_numeric(values, downcast='integer')
+            elif np.allclose(array.astype('float32'), array, rtol=1e-6, atol=0, equal_nan=True):
+                compact[col] = values.astype('float32')
+    return data.assign(**compact)
+
+
+def row_index(data, column='country'):
+    """
+    Return {key: (first row, end row)} for a frame whose rows are grouped by
+    column, as in the cleaned files, or None when they are not. Built once per frame.
+    """
+    return _frame_cache(data, ('row_index', column), lambda: _build_row_index(data[column]))
+
+
+def _build_row_index(values):
+    """
+    Build the index returned by row_index from the key column.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, keys = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, keys = pd.factorize(values)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+    if len(np.unique(codes[starts])) < len(starts):
+        return None
+    stops = np.r_[starts[1:], len(codes)]
+    # Code -1 marks missing keys, which no country matches
+    return {keys[codes[start]]: (int(start), int(stop)) for start, stop in zip(starts, stops) if codes[start] >= 0}
+
+
+def dates_sorted(data, column='country'):
+    """
+    Return True when a frame grouped by column (see row_index) has ascending
+    dates within every key. Checked once per frame.
+    """
+    def check():
+        index = row_index(data, column)
+        if index is None or 'date' not in data.columns:
+            return False
+        dates = data['date'].to_numpy()
+        ascending = dates[1:] >= dates[:-1]
+        # A new key may start at an earlier date
+        starts = [start for start, _ in index.values() if start > 0]
+        ascending[np.array(starts, dtype=int) - 1] = True
+        return bool(ascending.all())
+
+    return _frame_cache(data, ('dates_sorted', column), check)
+
+
+def _frame_cache(data, key, build):
+    """
+    Return build(), computed once per frame and kept until the frame is
+    dropped (or its shape changes).
+    """
+    cache_key = (id(data), key)
+    cached = _frame_caches.get(cache_key)
+    if cached is not None and cached[0]() is data and cached[1] == data.shape:
+        return cached[2]
+
+    value = build()
+    # Dropped with the frame, so a new frame reusing its id is never served a stale value
+    # (the dict is bound now, module globals may already be gone when the interpreter exits)
+    reference = weakref.ref(data, lambda _, caches=_frame_caches: caches.pop(cache_key, None))
+    _frame_caches[cache_key] = (reference, data.shape, value)
+    return value
+
+
+# Values built by _frame_cache: {(id(frame), key): (weak reference to the frame, shape, value)}
+_frame_caches = {}
+
+
+def date_bounds(dates, start, stop, start_date=None, end_date=None):
+    """
+    Narrow the row range [start, stop) of ascending dates to
+    start_date <= date <= end_date with two binary searches.
+    """
+    if start_date is not None:
+        start += int(np.searchsorted(dates[start:stop], pd.Timestamp(start_date).to_datetime64(), side='left'))
+    if end_date is not None:
+        stop = start + int(np.searchsorted(dates[start:stop], pd.Timestamp(end_date).to_datetime64(), side='right'))
+    return start, stop
+
+
+def date_mask(data, start_date=None, end_date=None):
+    """
+    Return a boolean array, True for the rows with start_date <= date <= end_date.
+    """
+    mask = np.ones(len(data), dtype=bool)
+    if start_date is not None:
+        mask &= (data['date'] >= pd.Timestamp(start_date)).to_numpy()
+    if end_date is not None:
+        mask &= (data['date'] <= pd.Timestamp(end_date)).to_numpy()
+    return mask
+
+
+def country_rows(data, country, start_date=None, end_date=None):
+    """
+    Return the rows of one country, optionally limited to start_date <= date <= end_date,
+    sliced through row_index with binary-searched dates where the frame allows it.
+    """
+    index = row_index(data)
+    if index is None:
+        data = data[data['country'] == country]
+    else:
+        start, stop = index.get(country, (0, 0))
+        if (start_date is not None or end_date is not None) and dates_sorted(data):
+            start, stop = date_bounds(data['date'].to_numpy(), start, stop, start_date, end_date)
+            return data.iloc[start:stop]
+        data = data.iloc[start:stop]
+
+    if start_date is None and end_date is None:
+        return data
+    return data[date_mask(data, start_date, end_date)]
+
+
+def date_rows(data, start_date=None, end_date=None, column='country'):
+    """
+    Return the rows of every country (or other key column) with
+    start_date <= date <= end_date, binary-searched like country_rows.
+    """
+    if start_date is None and end_date is None:
+        return data
+    if not dates_sorted(data, column):
+        return data[date_mask(data, start_date, end_date)]
+
+    dates = data['date'].to_numpy()
+    ranges = [date_bounds(dates, start, stop, start_date, end_date) for start, stop in row_index(data, column).values()]
+    positions = [np.arange(start, stop) for start, stop in sorted(ranges) if stop > start]
+    return data.iloc[np.concatenate(positions) if positions else np.array([], dtype=int)]
+
+
+def rollup_rule(column):
+    """
+    Return how rollup aggregates a column: 'sum', 'mean', 'last' or 'max' (see ROLLUP_RULES).
+    """
+    return next((how for pattern, how in ROLLUP_RULES if fnmatch.fnmatchcase(column, pattern)), 'mean')
+
+
+def rollup(data, interval='daily', column='country'):
+    """
+    Return a frame aggregated to one row per key and week or month, dated by
+    the first day of the period, each column as rollup_rule says. Built once per frame.
+
+    Parameters:
+        data (pd.DataFrame): Daily rows, with a 'date' column.
+        interval (str): 'daily' (data is returned as it is), 'weekly' or 'monthly'.
+        column (str): Key column the rows are grouped by.
+
+    Returns:
+        pd.DataFrame: The aggregated rows, with the columns of data.
+    """
+    if interval == 'daily':
+        return data
+    if interval not in ROLLUP_PERIODS:
+        raise ValueError(f"Invalid interval {interval!r}. Choose 'daily', 'weekly' or 'monthly'.")
+    return _frame_cache(data, ('rollup', interval, column), lambda: _build_rollup(data, interval, column))
+
+
+def _build_rollup(data, interval, column):
+    """
+    Build the frame returned by rollup.
+    """
+    keys = [column, 'date'] + [col for col in data.columns if col not in (column, 'date') and (
+        isinstance(data[col].dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(data[col].dtype))]
+    values = [col for col in data.columns if col not in keys]
+    periods = data['date'].dt.to_period(ROLLUP_PERIODS[interval]).dt.start_time
+
+    # Groups keep the order of the rows, so the result is grouped by country and sorted by date too
+    grouped = data.assign(date=periods).groupby(keys, observed=True, sort=False)
+    rules = {col: rollup_rule(col) for col in values}
+    parts = []
+    for how in ('sum', 'mean', 'last', 'max'):
+        columns = [col for col in values if rules[col] == how]
+        if not columns:
+            continue
+        # min_count keeps a period without any value missing instead of 0
+        parts.append(grouped[columns].sum(min_count=1) if how == 'sum' else grouped[columns].agg(how))
+    rolled = pd.concat(parts, axis=1) if parts else grouped.size().to_frame()[[]]
+    rolled = pd.concat([rolled.index.to_frame(index=False), rolled.reset_index(drop=True)], axis=1)
+    return rolled[list(data.columns)]
+
+
+def count_unit(column):
+    """
+    Return the unit a count column is stored in ('total', 'per_thousand', 'per_100k'
+    or 'per_million', see COUNT_UNIT_RULES), or None for columns that are not counts.
+    """
+    return next((unit for pattern, unit in COUNT_UNIT_RULES if fnmatch.fnmatchcase(column, pattern)), None)
+
+
+def population_table():
+    """
+    Return the population of every country as a Series indexed by country name,
+    derived from the count and per capita columns of POPULATION_SOURCES.
+    """
+    store = get_data_store()
+    versions = tuple(store.data_version(name) for name in POPULATION_SOURCES)
+    with _population_lock:
+        if versions not in _population_tables:
+            _population_tables.clear()
+            _population_tables[versions] = _build_population_table(store)
+        return _population_tables[versions]
+
+
+def _build_population_table(store):
+    """
+    Build the table returned by population_table.
+    """
+    table = pd.Series(dtype='float64')
+    for name, pairs in POPULATION_SOURCES.items():
+        # An uncached read: the table is built once, the columns are not needed afterwards
+        data = store.read(name, ['country'] + [col for pair in pairs for col in pair])
+        for count, per_capita in pairs:
+            counts = data[count].to_numpy(dtype='float64')
+            rates = data[per_capita].to_numpy(dtype='float64')
+            valid = (counts > 0) & (rates > 0)
+            people = counts[valid] / rates[valid] * POPULATION_UNITS[count_unit(per_capita)]
+            estimate = pd.Series(people).groupby(data['country'].to_numpy()[valid]).median()
+            table = table.combine_first(estimate)
+    return table
+
+
+_population_tables = {}
+_population_lock = threading.Lock()
+
+
+def normalize(data, population=None):
+    """
+    Return data with every count column (see count_unit) converted to one
+    population unit, keeping the column names. Built once per frame and unit.
+
+    Parameters:
+        data (pd.DataFrame): Rows of a dataset.
+        population (str): 'total', 'per_thousand', 'per_100k', 'per_million', or None for the stored units.
+
+    Returns:
+        pd.DataFrame: The converted rows, or data itself when normalized_unit is None.
+    """
+    if normalized_unit(data, population) is None:
+        return data
+    return _frame_cache(data, ('normalize', population), lambda: _build_normalized(data, population))
+
+
+def normalized_unit(data, population):
+    """
+    Return the unit normalize converts data to, or None when it returns data
+    as stored (no unit asked for, or no 'country' column).
+    """
+    if population is None or 'country' not in data.columns:
+        return None
+    if population not in POPULATION_UNITS:
+        raise ValueError(f"Invalid population unit {population!r}. Choose one of {list(POPULATION_UNITS)}.")
+    return population
+
+
+def _build_normalized(data, population):
+    """
+    Build the frame returned by normalize.
+    """
+    target = POPULATION_UNITS[population]
+    people = None
+    converted = {}
+    for col in data.columns:
+        unit = count_unit(col)
+        if unit is None or unit == population:
+            continue
+        stored = POPULATION_UNITS[unit]
+        if stored is not None and target is not None:
+            factor = target / stored
+        else:
+            if people is None:
+                people = _row_population(data['country'])
+            factor = people / stored if target is None else target / people
+        values = data[col].to_numpy(dtype='float64') * factor
+        converted[col] = values.astype(data[col].dtype) if pd.api.types.is_float_dtype(data[col].dtype) else values
+    return data.assign(**converted) if converted else data
+
+
+def _row_population(countries):
+    """
+    Return the population of the country of every row (NaN where it is unknown).
+    """
+    table = population_table()
+    if isinstance(countries.dtype, pd.CategoricalDtype):
+        codes = countries.cat.codes.to_numpy()
+        people = table.reindex(countries.cat.categories).to_numpy(dtype='float64')[codes]
+        people[codes < 0] = np.nan
+        return people
+    return countries.map(table).to_numpy(dtype='float64')
+
+
+def prepare(data, interval='daily', population=None, column='country'):
+    """
+    Return data rolled up to the interval (see rollup) with its counts in the
+    population unit (see normalize).
+    """
+    return normalize(rollup(data, interval, column), population)
+
+
+def unit_column_name(column, population):
+    """
+    Return the name a count column has in the given unit, e.g. 'new_cases_per_million'
+    for ('new_cases', 'per_million') and 'new_cases' for ('new_cases_per_million', 'total').
+    Other columns keep their name.
+    """
+    if population is None or count_unit(column) is None:
+        return column
+    base = re.sub(r'_per_(million|1m|100k|thousand)', '', column)
+    return base if population == 'total' else f'{base}_{population}'
+
+
+# Units as written in chart titles and labels
+UNIT_LABELS = {'total': 'total', 'per_thousand': 'per thousand people', 'per_100k': 'per 100k people',
+               'per_million': 'per million people'}
+
+
+def label_units(component, population):
+    """
+    Relabel a Plotly figure or Dash DataTable whose data went through normalize
+    with the unit's column names and titles.
+    """
+    if population is None:
+        return component
+
+    def relabel(text):
+        text = re.sub(r'[a-z][a-z0-9_]*', lambda match: unit_column_name(match.group(0), population), text)
+        unit = '' if population == 'total' else UNIT_LABELS[population].replace(' people', '')
+        return re.sub(r' ?\b[Pp]er (Million|million|Thousand|thousand|1M|1m|100k)\b', f' {unit}' if unit else '', text)
+
+    if hasattr(component, 'columns'):
+        # A count and its per capita column (new_cases, new_cases_per_million) now hold the same figures
+        columns = {}
+        for col in component.columns:
+            name = unit_column_name(col['name'], population)
+            columns.setdefault(name, {**col, 'name': name})
+        component.columns = list(columns.values())
+        return component
+
+    for trace in component.data:
+        for attribute in ('name', 'legendgroup', 'hovertemplate'):
+            if getattr(trace, attribute, None):
+                setattr(trace, attribute, relabel(getattr(trace, attribute)))
+    for axis in ('xaxis', 'yaxis'):
+        title = component.layout[axis].title.text
+        if title:
+            component.layout[axis].title.text = relabel(title)
+    if component.layout.coloraxis.colorbar.title.text:
+        component.layout.coloraxis.colorbar.title.text = relabel(component.layout.coloraxis.colorbar.title.text)
+    title = component.layout.title.text
+    component.layout.title.text = f"{relabel(title) if title else ''} ({UNIT_LABELS[population]})".strip()
+    return component
+
+
+def join_country(left, right, country, start_date=None, end_date=None, on=('country', 'date')):
+    """
+    Inner-join two datasets for one country, cutting both sides down to the
+    country (and date range) before pd.merge.
+
+    Parameters:
+        left (pd.DataFrame): Left dataset, with a 'country' column.
+        right (pd.DataFrame): Right dataset, with a 'country' column.
+        country (str): Country to keep.
+        start_date (str): First date to keep, or None.
+        end_date (str): Last date to keep, or None.
+        on (tuple): Columns to join on.
+
+    Returns:
+        pd.DataFrame: The joined rows of the country.
+    """
+    return pd.merge(
+        country_rows(left, country, start_date, end_date),
+        country_rows(right, country, start_date, end_date),
+        on=list(on)
+    )
+
+
+def fact_rows(fact, sources, columns, country=None, start_date=None, end_date=None):
+    """
+    Return the rows of the country_daily fact table that every one of the given
+    sources contributed (the rows pd.merge of those datasets would return),
+    restricted to the given columns, or to every value column inside all_columns.
+    """
+    if getattr(_all_columns, 'enabled', False):
+        columns = ['country', 'date'] + [col for source in sources for col in DATASETS[source]['values']
+                                         if col in fact.columns]
+    if country is not None:
+        fact = country_rows(fact, country, start_date, end_date)
+    else:
+        fact = date_rows(fact, start_date, end_date)
+    present = np.logical_and.reduce([fact[f'has_{source}'].to_numpy() for source in sources])
+    return fact.loc[present, columns]
+
+
+def country_summary(data, start_date=None, end_date=None, keys=('country',), columns=None):
+    """
+    Return one row per country (or per keys) with the max, latest value, mean
+    and total of every numeric column, named '<column>_<statistic>'. Built once
+    per frame; a date window is summarized from its rows on every request.
+
+    Parameters:
+        data (pd.DataFrame): Rows of the dataset, e.g. from prepare.
+        start_date (str): First date to summarize, or None.
+        end_date (str): Last date to summarize, or None.
+        keys (tuple): Columns the rows are summarized by.
+        columns (list): Columns a date window is summarized over, or None for every numeric column.
+
+    Returns:
+        pd.DataFrame: The summary, with the keys as columns.
+    """
+    if start_date is not None or end_date is not None:
+        rows = date_rows(data, start_date, end_date, keys[0])
+        return _build_country_summary(rows if columns is None else rows[list(keys) + list(columns)], keys)
+    return _frame_cache(data, ('country_summary', keys), lambda: _build_country_summary(data, keys))
+
+
+def _build_country_summary(data, keys):
+    """
+    Build the table returned by country_summary.
+    """
+    values = [col for col in data.columns if col not in keys and pd.api.types.is_numeric_dtype(data[col].dtype)
+              and not pd.api.types.is_bool_dtype(data[col].dtype)]
+    grouped = data.groupby(list(keys), observed=True)[values]
+    summary = pd.concat([grouped.max(), grouped.last(), grouped.mean(), grouped.sum(min_count=1)], axis=1,
+                        keys=SUMMARY_STATISTICS)
+    summary.columns = [f'{col}_{statistic}' for statistic, col in summary.columns]
+    return summary.reset_index()
+
+
+# Whether the current thread is inside all_columns
+_all_columns = threading.local()
+
+
+@contextlib.contextmanager
+def all_columns(enabled=True):
+    """
+    Serve every column of each dataset to LazyDataset attributes and fact_rows
+    while the block runs (when enabled), as the table views need.
+    """
+    previous = getattr(_all_columns, 'enabled', False)
+    _all_columns.enabled = previous or enabled
+    try:
+        yield
+    finally:
+        _all_columns.enabled = previous
+
+
+class LazyDataset:
+    """
+    Class attribute that loads a dataset from the shared DataStore the first
+    time an instance reads it, e.g. cases_deaths = LazyDataset('cases_deaths').
+    Only the columns needed by the instance's metrics (self.metrics, None for
+    every method) are read, see dataset_manifest.required_columns.
+    """
+
+    def __init__(self, name, columns=None):
+        self.name = name
+        self.columns = columns
+        self.attribute = None
+
+    def __set_name__(self, owner, attribute):
+        self.attribute = attribute
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        every_column = getattr(_all_columns, 'enabled', False)
+        frames = instance.__dict__.setdefault('_lazy_datasets', {})
+        data = frames.get((self.attribute, every_column))
+        if data is not None:
+            return data
+
+        columns = self.columns
+        if every_column:
+            columns = None
+        elif columns is None:
+            analysis = type(instance).__name__
+            columns = required_columns(analysis, getattr(instance, 'metrics', None)).get(self.name)
+            if columns is None:
+                columns = required_columns(analysis)[self.name]
+        data = get_data_store().get(self.name, columns=columns)
+        frames[(self.attribute, every_column)] = data
+        return data
+
+
+_data_store = None
+_data_store_lock = threading.Lock()
+
+
+def get_data_store():
+    """
+    Return the process-wide DataStore shared by all analysis classes.
+    """
+    global _data_store
+    with _data_store_lock:
+        if _data_store is None:
+            _data_store = DataStore()
+        return _data_store
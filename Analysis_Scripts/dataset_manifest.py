@@ -0,0 +1,309 @@
+# dataset_manifest.py
+
+# Schema of every cleaned dataset the analysis classes use, as written by the
+# data_cleaning_scripts. Column names are the ones seen after loading (the
+# excess mortality file stores 'country' as 'entity', see DataStore).
+DATASETS = {
+    'cases_deaths': {
+        'file': 'cases_deaths_cleaned',
+        'keys': ['country', 'date'],
+        'values': [
+            'new_cases', 'total_cases', 'new_deaths', 'total_deaths', 'weekly_cases', 'weekly_deaths',
+            'weekly_pct_growth_cases', 'weekly_pct_growth_deaths', 'biweekly_cases', 'biweekly_deaths',
+            'biweekly_pct_growth_cases', 'biweekly_pct_growth_deaths', 'new_cases_per_million',
+            'new_deaths_per_million', 'total_cases_per_million', 'total_deaths_per_million',
+            'weekly_cases_per_million', 'weekly_deaths_per_million', 'biweekly_cases_per_million',
+            'biweekly_deaths_per_million', 'total_deaths_per_100k', 'new_deaths_per_100k',
+            'new_cases_7_day_avg_right', 'new_deaths_7_day_avg_right', 'new_cases_per_million_7_day_avg_right',
+            'new_deaths_per_million_7_day_avg_right', 'new_deaths_per_100k_7_day_avg_right', 'cfr',
+            'cfr_100_cases', 'cfr_short_term', 'days_since_100_total_cases', 'days_since_5_total_deaths',
+            'days_since_1_total_cases_per_million', 'days_since_0_1_total_deaths_per_million',
+            'days_since_100_total_cases_and_5m_pop', 'total_deaths_last12m', 'total_deaths_per_100k_last12m',
+            'total_deaths_per_million_last12m'],
+    },
+    'government_response': {
+        'file': 'Government_response_policy_cleaned',
+        'keys': ['country', 'date'],
+        'values': [
+            'c1m_school_closing', 'c2m_workplace_closing', 'c3m_cancel_public_events',
+            'c4m_restrictions_on_gatherings', 'c5m_close_public_transport', 'c6m_stay_at_home_requirements',
+            'c7m_restrictions_on_internal_movement', 'c8ev_international_travel_controls', 'e1_income_support',
+            'e2_debt_contract_relief', 'e3_fiscal_measures', 'e4_international_support',
+            'h1_public_information_campaigns', 'h2_testing_policy', 'h3_contact_tracing',
+            'h4_emergency_investment_in_healthcare', 'h5_investment_in_vaccines', 'h6m_facial_coverings',
+            'h7_vaccination_policy', 'v2a_vaccine_availability__summary',
+            'v2b_vaccine_age_eligibility_availability_age_floor__general_population_summary',
+            'v2c_vaccine_age_eligibility_availability_age_floor__at_risk_summary', 'stringency_index',
+            'containment_health_index', 'v2_vaccine_availability__summary', 'v2_pregnant_people',
+            'stringency_index_nonvax', 'stringency_index_vax', 'stringency_index_weighted_average'],
+    },
+    'reproduction_rate': {
+        'file': 'reproduction_rate_cleaned',
+        'keys': ['country', 'date'],
+        'values': ['r', 'ci_95_u', 'ci_95_l', 'ci_65_u', 'ci_65_l', 'days_infectious'],
+    },
+    'testing': {
+        'file': 'testing_cleaned',
+        'keys': ['country', 'date'],
+        'values': [
+            'total_tests', 'new_tests', 'total_tests_per_thousand', 'new_tests_per_thousand',
+            'new_tests_7day_smoothed', 'new_tests_per_thousand_7day_smoothed'],
+    },
+    'hospital': {
+        'file': 'hospital_cleaned',
+        'keys': ['country', 'country_code', 'date'],
+        'values': [
+            'daily_occupancy_icu', 'daily_occupancy_icu_per_1m', 'daily_occupancy_hosp', 'daily_occupancy_hosp_per_1m',
+            'weekly_admissions_icu', 'weekly_admissions_icu_per_1m', 'weekly_admissions_hosp',
+            'weekly_admissions_hosp_per_1m'],
+    },
+    'excess_mortality': {
+        'file': 'excess_mortality_cleaned',
+        'keys': ['country', 'date'],
+        'values': [
+            'time', 'time_unit', 'average_deaths_2015_2019_all_ages', 'p_avg_0_14', 'p_avg_15_64', 'p_avg_65_74',
+            'p_avg_75_84', 'p_avg_85p', 'p_avg_all_ages', 'projected_deaths_since_2020_all_ages', 'p_proj_0_14',
+            'p_proj_15_64', 'p_proj_65_74', 'p_proj_75_84', 'p_proj_85p', 'p_proj_all_ages', 'excess_proj_all_ages',
+            'deaths_since_2020_all_ages', 'deaths_2010_all_ages', 'deaths_2011_all_ages', 'deaths_2012_all_ages',
+            'deaths_2013_all_ages', 'deaths_2014_all_ages', 'deaths_2015_all_ages', 'deaths_2016_all_ages',
+            'deaths_2017_all_ages', 'deaths_2018_all_ages', 'deaths_2019_all_ages', 'deaths_2020_all_ages',
+            'deaths_2021_all_ages', 'deaths_2022_all_ages', 'deaths_2023_all_ages', 'deaths_2024_all_ages',
+            'cum_excess_proj_all_ages', 'cum_proj_deaths_all_ages', 'cum_p_proj_all_ages',
+            'excess_per_million_proj_all_ages', 'cum_excess_per_million_proj_all_ages',
+            'cum_excess_proj_all_ages_last12m', 'cum_excess_per_million_proj_all_ages_last12m'],
+    },
+    'google_mobility': {
+        'file': 'google_mobility_cleaned',
+        'keys': ['country', 'place', 'date'],
+        'values': ['trend'],
+    },
+    'vaccinations_age': {
+        'file': 'vaccinations_age_cleaned_new',
+        'keys': ['country', 'age_group', 'date'],
+        'values': ['people_vaccinated_per_hundred', 'people_fully_vaccinated_per_hundred',
+                   'people_with_booster_per_hundred'],
+    },
+    'vaccinations_us': {
+        'file': 'vaccinations_us_cleaned',
+        'keys': ['state', 'date'],
+        'values': [
+            'total_vaccinations', 'total_distributed', 'people_vaccinated', 'people_fully_vaccinated_per_hundred',
+            'total_vaccinations_per_hundred', 'people_fully_vaccinated', 'people_vaccinated_per_hundred',
+            'distributed_per_hundred', 'daily_vaccinations_raw', 'daily_vaccinations',
+            'daily_vaccinations_per_million', 'share_doses_used', 'total_boosters', 'total_boosters_per_hundred'],
+    },
+    'vaccinations_manufacturer': {
+        'file': 'vaccinations_manufacturer_cleaned',
+        'keys': ['country', 'vaccine', 'date'],
+        'values': ['total_vaccinations'],
+    },
+    'attitudes': {
+        'file': 'Attitudes_cleaned',
+        'keys': ['country', 'date'],
+        'values': [
+            'people_vaccinated_per_hundred', 'uncertain_covid_vaccinate_this_week_pct_pop',
+            'unwillingness_covid_vaccinate_this_week_pct_pop', 'willingness_covid_vaccinate_this_week_pct_pop'],
+    },
+}
+
+# Datasets with one row per (country, date), joined by data_cleaning_scripts/build_fact_table.py
+FACT_SOURCES = ['cases_deaths', 'government_response', 'testing', 'hospital', 'reproduction_rate', 'excess_mortality']
+
+# The joined fact table: every value column of FACT_SOURCES plus a has_<source> flag per source
+DATASETS['country_daily'] = {
+    'file': 'country_daily_cleaned',
+    'keys': ['country', 'date'],
+    'values': [f'has_{source}' for source in FACT_SOURCES] + [
+        col for source in FACT_SOURCES for col in DATASETS[source]['values']],
+}
+
+# Columns each _process_* method reads, per dataset, including the columns its
+# _plot_* charts and maps use. Keep these in step with the methods. Tables show
+# every column and are processed with all of them (see data_store.all_columns).
+METHOD_COLUMNS = {
+    'CasesDeathAnalysis': {
+        '_process_cfr_data': {
+            'cases_deaths': ['country', 'date', 'total_cases', 'total_deaths']},
+        '_process_weekly_biweekly_growth_data': {
+            'cases_deaths': ['country', 'date', 'weekly_pct_growth_cases', 'biweekly_pct_growth_cases',
+                             'weekly_pct_growth_deaths', 'biweekly_pct_growth_deaths']},
+        '_process_cases_deaths_per_million_data': {
+            'cases_deaths': ['country', 'date', 'new_cases_per_million', 'new_deaths_per_million']},
+        '_process_policy_impact_data': {
+            'country_daily': ['country', 'date', 'has_cases_deaths', 'has_government_response',
+                              'new_cases_per_million', 'new_deaths_per_million', 'stringency_index']},
+        '_process_reproduction_rate_trends_data': {
+            'reproduction_rate': ['country', 'date', 'r', 'ci_95_l', 'ci_95_u']},
+        '_process_testing_vs_case_detection_data': {
+            'country_daily': ['country', 'date', 'has_testing', 'has_cases_deaths', 'new_tests_per_thousand',
+                              'new_cases_per_million']},
+        '_process_case_trends_data': {
+            'cases_deaths': ['country', 'date', 'new_cases', 'total_cases']},
+        '_process_death_trends_data': {
+            'cases_deaths': ['country', 'date', 'new_deaths', 'total_deaths']},
+        '_process_cfr_data_by_country': {
+            'cases_deaths': ['country', 'date', 'cfr']},
+    },
+    'VaccinationAnalysis': {
+        '_process_vaccination_rates_over_time_data': {
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred',
+                                 'people_fully_vaccinated_per_hundred', 'people_with_booster_per_hundred'],
+            'vaccinations_us': ['state', 'date', 'people_vaccinated_per_hundred',
+                                'people_fully_vaccinated_per_hundred', 'total_boosters_per_hundred']},
+        '_process_vaccination_attitudes_data': {
+            'attitudes': ['country', 'date', 'willingness_covid_vaccinate_this_week_pct_pop',
+                          'uncertain_covid_vaccinate_this_week_pct_pop',
+                          'unwillingness_covid_vaccinate_this_week_pct_pop']},
+        '_process_vaccination_by_age_group_data': {
+            'vaccinations_age': ['country', 'date', 'age_group', 'people_vaccinated_per_hundred',
+                                 'people_fully_vaccinated_per_hundred']},
+        '_process_vaccination_by_manufacturer_data': {
+            'vaccinations_manufacturer': ['country', 'date', 'vaccine', 'total_vaccinations']},
+        '_process_vaccination_vs_cfr_data': {
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred'],
+            'vaccinations_us': ['state', 'date', 'people_vaccinated_per_hundred'],
+            'cases_deaths': ['country', 'date', 'cfr']},
+        '_process_vaccination_vs_reproduction_rate_data': {
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred'],
+            'reproduction_rate': ['country', 'date', 'r']},
+        '_process_vaccination_vs_excess_mortality_data': {
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred'],
+            'excess_mortality': ['country', 'date', 'excess_proj_all_ages']},
+        '_process_us_vaccination_trends_data': {
+            'vaccinations_us': ['state', 'date', 'people_vaccinated_per_hundred',
+                                'people_fully_vaccinated_per_hundred', 'total_boosters_per_hundred']},
+    },
+    'PolicyAnalysis': {
+        '_process_policy_stringency_over_time_data': {
+            'government_response': ['country', 'date', 'stringency_index']},
+        '_process_policy_impact_on_cases_deaths_data': {
+            'country_daily': ['country', 'date', 'has_government_response', 'has_cases_deaths', 'stringency_index',
+                              'new_cases_per_million', 'new_deaths_per_million']},
+        '_process_policy_impact_on_mobility_data': {
+            'government_response': ['country', 'date', 'stringency_index'],
+            'google_mobility': ['country', 'date', 'trend']},
+        '_process_policy_impact_on_vaccination_data': {
+            'government_response': ['country', 'date', 'stringency_index'],
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred']},
+        '_process_policy_impact_on_excess_mortality_data': {
+            'country_daily': ['country', 'date', 'has_government_response', 'has_excess_mortality',
+                              'stringency_index', 'excess_proj_all_ages']},
+        '_process_policy_effectiveness_by_country_data': {
+            'country_daily': ['country', 'date', 'has_government_response', 'has_cases_deaths', 'stringency_index',
+                              'new_cases_per_million']},
+    },
+    'TestingHealthcareAnalysis': {
+        '_process_testing_rates_over_time_data': {
+            'testing': ['country', 'date', 'new_tests_per_thousand']},
+        '_process_testing_vs_case_detection_data': {
+            'country_daily': ['country', 'date', 'has_testing', 'has_cases_deaths', 'new_tests_per_thousand',
+                              'new_cases_per_million']},
+        '_process_healthcare_capacity_over_time_data': {
+            'hospital': ['country', 'date', 'daily_occupancy_icu_per_1m', 'daily_occupancy_hosp_per_1m']},
+        '_process_healthcare_capacity_vs_cfr_data': {
+            'country_daily': ['country', 'date', 'has_hospital', 'has_cases_deaths', 'daily_occupancy_icu_per_1m',
+                              'cfr']},
+        '_process_healthcare_capacity_vs_excess_mortality_data': {
+            'country_daily': ['country', 'date', 'has_hospital', 'has_excess_mortality', 'daily_occupancy_icu_per_1m',
+                              'excess_proj_all_ages']},
+        '_process_testing_healthcare_by_country_data': {
+            'testing': ['country', 'date', 'new_tests_per_thousand'],
+            'hospital': ['country', 'date', 'daily_occupancy_icu_per_1m']},
+    },
+    'ExcessMortalityAnalysis': {
+        '_process_excess_mortality_over_time_data': {
+            'excess_mortality': ['country', 'date', 'excess_proj_all_ages']},
+        '_process_age_specific_excess_mortality_data': {
+            'excess_mortality': ['country', 'date', 'p_avg_0_14', 'p_avg_15_64', 'p_avg_65_74', 'p_avg_75_84',
+                                 'p_avg_85p']},
+        '_process_projected_vs_actual_deaths_data': {
+            'excess_mortality': ['country', 'date', 'projected_deaths_since_2020_all_ages',
+                                 'deaths_since_2020_all_ages']},
+        '_process_cumulative_excess_mortality_data': {
+            'excess_mortality': ['country', 'date', 'cum_excess_proj_all_ages']},
+        '_process_excess_mortality_by_country_data': {
+            'excess_mortality': ['country', 'date', 'excess_proj_all_ages']},
+        '_process_excess_mortality_vs_vaccination_data': {
+            'excess_mortality': ['country', 'date', 'excess_proj_all_ages'],
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred']},
+        '_process_excess_mortality_vs_policies_data': {
+            'country_daily': ['country', 'date', 'has_excess_mortality', 'has_government_response',
+                              'excess_proj_all_ages', 'stringency_index']},
+        '_process_excess_mortality_vs_healthcare_data': {
+            'country_daily': ['country', 'date', 'has_excess_mortality', 'has_hospital', 'excess_proj_all_ages',
+                              'daily_occupancy_icu_per_1m']},
+    },
+    'MobilityAnalysis': {
+        '_process_mobility_trends_over_time_data': {
+            'google_mobility': ['country', 'date', 'place', 'trend']},
+        '_process_mobility_trends_by_country_data': {
+            'google_mobility': ['country', 'date', 'place', 'trend']},
+        '_process_mobility_vs_case_growth_data': {
+            'google_mobility': ['country', 'date', 'place', 'trend'],
+            'cases_deaths': ['country', 'date', 'weekly_pct_growth_cases']},
+        '_process_mobility_vs_policies_data': {
+            'google_mobility': ['country', 'date', 'trend'],
+            'government_response': ['country', 'date', 'stringency_index']},
+        '_process_mobility_vs_vaccination_data': {
+            'google_mobility': ['country', 'date', 'place', 'trend'],
+            'vaccinations_age': ['country', 'date', 'people_vaccinated_per_hundred']},
+        '_process_mobility_vs_excess_mortality_data': {
+            'google_mobility': ['country', 'date', 'place', 'trend'],
+            'excess_mortality': ['country', 'date', 'excess_proj_all_ages']},
+    },
+}
+
+
+def schema_columns(dataset):
+    """
+    Return every column of a cleaned dataset, keys first.
+    """
+    spec = DATASETS[dataset]
+    return spec['keys'] + spec['values']
+
+
+def metric_method(metric):
+    """
+    Return the _process_* method behind a metric name, e.g. 'cfr' -> '_process_cfr_data'
+    and 'cfr_by_country' -> '_process_cfr_data_by_country'.
+    """
+    for methods in METHOD_COLUMNS.values():
+        for method in methods:
+            if method[len('_process_'):].replace('_data', '', 1) == metric:
+                return method
+    raise ValueError(f"Unknown metric '{metric}'.")
+
+
+def required_columns(analysis, metrics=None):
+    """
+    Return the columns an analysis class needs from each dataset for the given metrics.
+
+    Parameters:
+        analysis (str): Analysis class name, e.g. 'CasesDeathAnalysis'.
+        metrics (list): Metric names as used by the dashboard (e.g. 'cfr'), or None for every method of the class.
+
+    Returns:
+        dict: {dataset name: list of columns}, each list in schema order.
+    """
+    methods = METHOD_COLUMNS[analysis]
+    if metrics is None:
+        selected = list(methods)
+    else:
+        selected = [metric_method(metric) for metric in metrics]
+        foreign = [method for method in selected if method not in methods]
+        if foreign:
+            raise ValueError(f"Metrics {foreign} do not belong to {analysis}.")
+
+    needed = {}
+    for method in selected:
+        for dataset, columns in methods[method].items():
+            needed.setdefault(dataset, set()).update(columns)
+
+    columns_by_dataset = {}
+    for dataset, columns in needed.items():
+        schema = schema_columns(dataset)
+        unknown = sorted(columns.difference(schema))
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not in the schema of dataset '{dataset}'.")
+        columns_by_dataset[dataset] = [col for col in schema if col in columns]
+    return columns_by_dataset
@@ -1,38 +1,27 @@
-import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import (LazyDataset, all_columns, country_rows, country_summary, fact_rows, join_country, label_units,
+                        normalize, prepare)
 
 
 class ExcessMortalityAnalysis:
-    def __init__(self):
+    excess_mortality = LazyDataset('excess_mortality')
+    vaccinations = LazyDataset('vaccinations_age')
+    country_daily = LazyDataset('country_daily')
+
+    def __init__(self, metrics=None):
         """
-        Initialize the ExcessMortalityAnalysis class with file paths.
+        Initialize the ExcessMortalityAnalysis class with the metrics it will plot.
         """
-        excess_mortality_path = "F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv"
-        vaccinations_path = "F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv"
-        government_response_path = "F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv"
-        healthcare_path = "F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\hospital_cleaned.csv"
-
-        # Load dataset
-        self.excess_mortality = pd.read_csv(excess_mortality_path)
-        self.vaccinations = pd.read_csv(vaccinations_path)
-        self.government_response = pd.read_csv(government_response_path)
-        self.healthcare = pd.read_csv(healthcare_path)
-        self.healthcare.columns = self.healthcare.columns.str.strip()
+        self.metrics = metrics
 
-        # Convert date column to datetime
-        self.excess_mortality['date'] = pd.to_datetime(self.excess_mortality['date'])
-        self.excess_mortality.rename(columns={'entity': 'country'}, inplace=True)
-        self.vaccinations['date'] = pd.to_datetime(self.vaccinations['date'])
-        self.government_response['date'] = pd.to_datetime(self.government_response['date'])
-        self.healthcare['date'] = pd.to_datetime(self.healthcare['date'])
-
-    def _process_excess_mortality_over_time_data(self, country):
+    def _process_excess_mortality_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                 population=None):
         """
         Process data for excess mortality over time analysis.
         """
-        country_data = self.excess_mortality[self.excess_mortality['country'] == country]
+        country_data = country_rows(prepare(self.excess_mortality, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -52,7 +41,7 @@ class ExcessMortalityAnalysis:
         Generate a map for excess mortality over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'excess_proj_all_ages': 'mean'
         }).reset_index()
 
@@ -75,28 +64,31 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_excess_mortality_over_time(self, country, visualization_type='chart'):
+    def plot_excess_mortality_over_time(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                        interval='daily', population=None):
         """
         Generate the specified visualization for excess mortality over time analysis.
         """
-        data = self._process_excess_mortality_over_time_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_excess_mortality_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_excess_mortality_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_excess_mortality_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_excess_mortality_over_time_table(data)
+            return label_units(self._plot_excess_mortality_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_age_specific_excess_mortality_data(self, country):
+    def _process_age_specific_excess_mortality_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                    population=None):
         """
         Process data for age-specific excess mortality analysis.
         """
-        country_data = self.excess_mortality[self.excess_mortality['country'] == country]
+        country_data = country_rows(prepare(self.excess_mortality, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
 
@@ -125,7 +117,7 @@ class ExcessMortalityAnalysis:
         Generate a map for age-specific excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country', as_index=False).agg({
+        aggregated_data = data.groupby('country', as_index=False, observed=True).agg({
             'Excess Mortality': 'mean'
         })
 
@@ -153,28 +145,31 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_age_specific_excess_mortality(self, country, visualization_type='chart'):
+    def plot_age_specific_excess_mortality(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                           interval='daily', population=None):
         """
         Generate the specified visualization for age-specific excess mortality analysis.
         """
-        data = self._process_age_specific_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_age_specific_excess_mortality_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_age_specific_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_age_specific_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_age_specific_excess_mortality_table(data)
+            return label_units(self._plot_age_specific_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_projected_vs_actual_deaths_data(self, country):
+    def _process_projected_vs_actual_deaths_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                 population=None):
         """
         Process data for projected vs. actual deaths analysis.
         """
-        country_data = self.excess_mortality[self.excess_mortality['country'] == country]
+        country_data = country_rows(prepare(self.excess_mortality, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -194,7 +189,7 @@ class ExcessMortalityAnalysis:
         Generate a map for projected vs. actual deaths analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'projected_deaths_since_2020_all_ages': 'mean',
             'deaths_since_2020_all_ages': 'mean'
         }).reset_index()
@@ -218,28 +213,31 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_projected_vs_actual_deaths(self, country, visualization_type='chart'):
+    def plot_projected_vs_actual_deaths(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                        interval='daily', population=None):
         """
         Generate the specified visualization for projected vs. actual deaths analysis.
         """
-        data = self._process_projected_vs_actual_deaths_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_projected_vs_actual_deaths_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_projected_vs_actual_deaths_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_projected_vs_actual_deaths_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_projected_vs_actual_deaths_table(data)
+            return label_units(self._plot_projected_vs_actual_deaths_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_cumulative_excess_mortality_data(self, country):
+    def _process_cumulative_excess_mortality_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                  population=None):
         """
         Process data for cumulative excess mortality analysis.
         """
-        country_data = self.excess_mortality[self.excess_mortality['country'] == country]
+        country_data = country_rows(prepare(self.excess_mortality, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -259,7 +257,7 @@ class ExcessMortalityAnalysis:
         Generate a map for cumulative excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'cum_excess_proj_all_ages': 'mean'
         }).reset_index()
 
@@ -282,29 +280,34 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_cumulative_excess_mortality(self, country, visualization_type='chart'):
+    def plot_cumulative_excess_mortality(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                         interval='daily', population=None):
         """
         Generate the specified visualization for cumulative excess mortality analysis.
         """
-        data = self._process_cumulative_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_cumulative_excess_mortality_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_cumulative_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_cumulative_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_cumulative_excess_mortality_table(data)
+            return label_units(self._plot_cumulative_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_excess_mortality_by_country_data(self):
+    def _process_excess_mortality_by_country_data(self, start_date=None, end_date=None, interval='daily',
+                                                  population=None):
         """
         Process data for excess mortality by country analysis.
         """
-        excess_mortality_by_country = self.excess_mortality.groupby('country')[
-            'excess_proj_all_ages'].max().reset_index()
+        summary = country_summary(prepare(self.excess_mortality, interval, population), start_date, end_date,
+                                  columns=['excess_proj_all_ages'])
+        excess_mortality_by_country = summary[['country', 'excess_proj_all_ages_max']].rename(
+            columns={'excess_proj_all_ages_max': 'excess_proj_all_ages'})
         return excess_mortality_by_country
 
     def _plot_excess_mortality_by_country_chart(self, data):
@@ -340,34 +343,40 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_excess_mortality_by_country(self, visualization_type='chart'):
+    def plot_excess_mortality_by_country(self, visualization_type='chart', start_date=None, end_date=None,
+                                         interval='daily', population=None):
         """
         Generate the specified visualization for excess mortality by country analysis.
         """
-        data = self._process_excess_mortality_by_country_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_excess_mortality_by_country_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_excess_mortality_by_country_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_excess_mortality_by_country_map(data)
         elif visualization_type == 'table':
-            return self._plot_excess_mortality_by_country_table(data)
+            return label_units(self._plot_excess_mortality_by_country_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_excess_mortality_vs_vaccination_data(self, country):
+    def _process_excess_mortality_vs_vaccination_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                      population=None):
         """
         Process data for excess mortality vs. vaccination analysis.
 
-        This function resamples the data to a weekly frequency and computes the mean
-        for each week. It does not use exact dates but rather aggregates data into
-        weekly averages for analysis.
+        This function resamples the data to a weekly frequency (monthly for the
+        monthly interval) and computes the mean for each period. It does not use
+        exact dates but rather aggregates data into weekly averages for analysis.
         """
-        # Clean country names
-        self.excess_mortality['country'] = self.excess_mortality['country'].str.strip().str.title()
-        self.vaccinations['country'] = self.vaccinations['country'].str.strip().str.title()
+        frequency = 'MS' if interval == 'monthly' else 'W'
+
+        # Keep the country's rows before any resampling or joining (the cleaned files store stripped,
+        # title-cased names, so the rows are sliced through the country index)
+        excess_mortality = country_rows(normalize(self.excess_mortality, population), country, start_date, end_date)
+        vaccinations = country_rows(normalize(self.vaccinations, population), country, start_date, end_date)
 
         # Select only numeric columns for resampling
         numeric_cols_excess = ['excess_proj_all_ages']  # Add other numeric columns if needed
@@ -375,33 +384,26 @@ class ExcessMortalityAnalysis:
 
         # Resample excess_mortality to weekly frequency
         excess_mortality_resampled = (
-            self.excess_mortality[['country', 'date'] + numeric_cols_excess]
+            excess_mortality[['country', 'date'] + numeric_cols_excess]
             .set_index('date')
-            .groupby('country')
-            .resample('W')
+            .groupby('country', observed=True)
+            .resample(frequency)
             .mean()
             .reset_index()
         )
 
         # Resample vaccinations to weekly frequency
         vaccinations_resampled = (
-            self.vaccinations[['country', 'date'] + numeric_cols_vaccinations]
+            vaccinations[['country', 'date'] + numeric_cols_vaccinations]
             .set_index('date')
-            .groupby('country')
-            .resample('W')
+            .groupby('country', observed=True)
+            .resample(frequency)
             .mean()
             .reset_index()
         )
 
         # Merge the resampled datasets
-        merged_data = pd.merge(
-            excess_mortality_resampled,
-            vaccinations_resampled,
-            on=['country', 'date']
-        )
-
-        # Filter data for the specified country
-        country_data = merged_data[merged_data['country'] == country]
+        country_data = join_country(excess_mortality_resampled, vaccinations_resampled, country)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -421,7 +423,7 @@ class ExcessMortalityAnalysis:
         Generate a map for excess mortality vs. vaccination analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -445,33 +447,36 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_excess_mortality_vs_vaccination(self, country, visualization_type='chart'):
+    def plot_excess_mortality_vs_vaccination(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                             interval='daily', population=None):
         """
         Generate the specified visualization for excess mortality vs. vaccination analysis.
         """
-        data = self._process_excess_mortality_vs_vaccination_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_excess_mortality_vs_vaccination_data(country, start_date, end_date, interval,
+                                                                      population)
 
         if visualization_type == 'chart':
             fig = self._plot_excess_mortality_vs_vaccination_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_excess_mortality_vs_vaccination_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_excess_mortality_vs_vaccination_table(data)
+            return label_units(self._plot_excess_mortality_vs_vaccination_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_excess_mortality_vs_policies_data(self, country):
+    def _process_excess_mortality_vs_policies_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                   population=None):
         """
         Process data for excess mortality vs. policies analysis.
         """
-        merged_data = pd.merge(
-            self.excess_mortality,
-            self.government_response,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_daily = prepare(self.country_daily, interval, population)
+        country_data = fact_rows(country_daily, ['excess_mortality', 'government_response'], [
+            'country', 'date', 'excess_proj_all_ages', 'stringency_index'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -491,7 +496,7 @@ class ExcessMortalityAnalysis:
         Generate a map for excess mortality vs. policies analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'excess_proj_all_ages': 'mean',
             'stringency_index': 'mean'
         }).reset_index()
@@ -515,33 +520,34 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_excess_mortality_vs_policies(self, country, visualization_type='chart'):
+    def plot_excess_mortality_vs_policies(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                          interval='daily', population=None):
         """
         Generate the specified visualization for excess mortality vs. policies analysis.
         """
-        data = self._process_excess_mortality_vs_policies_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_excess_mortality_vs_policies_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_excess_mortality_vs_policies_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_excess_mortality_vs_policies_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_excess_mortality_vs_policies_table(data)
+            return label_units(self._plot_excess_mortality_vs_policies_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_excess_mortality_vs_healthcare_data(self, country):
+    def _process_excess_mortality_vs_healthcare_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                     population=None):
         """
         Process data for excess mortality vs. healthcare analysis.
         """
-        merged_data = pd.merge(
-            self.excess_mortality,
-            self.healthcare,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_data = fact_rows(prepare(self.country_daily, interval, population), ['excess_mortality', 'hospital'], [
+            'country', 'date', 'excess_proj_all_ages', 'daily_occupancy_icu_per_1m'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -562,7 +568,7 @@ class ExcessMortalityAnalysis:
         Generate a map for excess mortality vs. healthcare analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'daily_occupancy_icu_per_1m': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -586,22 +592,25 @@ class ExcessMortalityAnalysis:
         )
         return table
 
-    def plot_excess_mortality_vs_healthcare(self, country, visualization_type='chart'):
+    def plot_excess_mortality_vs_healthcare(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                            interval='daily', population=None):
         """
         Generate the specified visualization for excess mortality vs. healthcare analysis.
         """
-        data = self._process_excess_mortality_vs_healthcare_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_excess_mortality_vs_healthcare_data(country, start_date, end_date, interval,
+                                                                     population)
 
         if visualization_type == 'chart':
             fig = self._plot_excess_mortality_vs_healthcare_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_excess_mortality_vs_healthcare_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_excess_mortality_vs_healthcare_table(data)
+            return label_units(self._plot_excess_mortality_vs_healthcare_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 # Example usage
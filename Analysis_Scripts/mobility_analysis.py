@@ -2,39 +2,28 @@ import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import LazyDataset, all_columns, country_rows, country_summary, join_country, label_units, prepare
 
 
 class MobilityAnalysis:
-    def __init__(self):
+    mobility = LazyDataset('google_mobility')
+    cases_deaths = LazyDataset('cases_deaths')
+    government_response = LazyDataset('government_response')
+    vaccinations = LazyDataset('vaccinations_age')
+    excess_mortality = LazyDataset('excess_mortality')
+
+    def __init__(self, metrics=None):
         """
-        Initialize the MobilityAnalysis class with file paths.
+        Initialize the MobilityAnalysis class with the metrics it will plot.
         """
-        mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.csv'
-        cases_deaths_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-        government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv'
-        vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv'
-        excess_mortality_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv'
-
-        # Load datasets
-        self.mobility = pd.read_csv(mobility_path)
-        self.cases_deaths = pd.read_csv(cases_deaths_path)
-        self.government_response = pd.read_csv(government_response_path)
-        self.vaccinations = pd.read_csv(vaccinations_path)
-        self.excess_mortality = pd.read_csv(excess_mortality_path)
+        self.metrics = metrics
 
-        # Convert date columns to datetime
-        self.mobility['date'] = pd.to_datetime(self.mobility['date'])
-        self.cases_deaths['date'] = pd.to_datetime(self.cases_deaths['date'])
-        self.government_response['date'] = pd.to_datetime(self.government_response['date'])
-        self.vaccinations['date'] = pd.to_datetime(self.vaccinations['date'])
-        self.excess_mortality['date'] = pd.to_datetime(self.excess_mortality['date'])
-        self.excess_mortality.rename(columns={'entity': 'country'}, inplace=True)
-
-    def _process_mobility_trends_over_time_data(self, country):
+    def _process_mobility_trends_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                population=None):
         """
         Process data for mobility trends over time analysis.
         """
-        country_data = self.mobility[self.mobility['country'] == country]
+        country_data = country_rows(prepare(self.mobility, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -54,7 +43,7 @@ class MobilityAnalysis:
         Generate a map for mobility trends over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'trend': 'mean'
         }).reset_index()
 
@@ -77,28 +66,33 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_trends_over_time(self, country, visualization_type='chart'):
+    def plot_mobility_trends_over_time(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                       interval='daily', population=None):
         """
         Generate the specified visualization for mobility trends over time analysis.
         """
-        data = self._process_mobility_trends_over_time_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_trends_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_trends_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_mobility_trends_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_mobility_trends_over_time_table(data)
+            return label_units(self._plot_mobility_trends_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_mobility_trends_by_country_data(self):
+    def _process_mobility_trends_by_country_data(self, start_date=None, end_date=None, interval='daily',
+                                                 population=None):
         """
         Process data for mobility trends by country analysis.
         """
-        mobility_by_country = self.mobility.groupby(['country', 'place'])['trend'].mean().reset_index()
+        summary = country_summary(prepare(self.mobility, interval, population), start_date, end_date,
+                                  keys=('country', 'place'), columns=['trend'])
+        mobility_by_country = summary[['country', 'place', 'trend_mean']].rename(columns={'trend_mean': 'trend'})
         return mobility_by_country
 
     def _plot_mobility_trends_by_country_chart(self, data):
@@ -134,33 +128,34 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_trends_by_country(self, visualization_type='chart'):
+    def plot_mobility_trends_by_country(self, visualization_type='chart', start_date=None, end_date=None,
+                                        interval='daily', population=None):
         """
         Generate the specified visualization for mobility trends by country analysis.
         """
-        data = self._process_mobility_trends_by_country_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_trends_by_country_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_trends_by_country_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_mobility_trends_by_country_map(data)
         elif visualization_type == 'table':
-            return self._plot_mobility_trends_by_country_table(data)
+            return label_units(self._plot_mobility_trends_by_country_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_mobility_vs_case_growth_data(self, country):
+    def _process_mobility_vs_case_growth_data(self, country, start_date=None, end_date=None, interval='daily',
+                                              population=None):
         """
         Process data for mobility vs. case growth analysis.
         """
-        merged_data = pd.merge(
-            self.mobility,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        mobility = prepare(self.mobility, interval, population)
+        cases_deaths = prepare(self.cases_deaths, interval, population)
+        country_data = join_country(mobility, cases_deaths, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -181,7 +176,7 @@ class MobilityAnalysis:
         Generate a map for mobility vs. case growth analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'trend': 'mean',
             'weekly_pct_growth_cases': 'mean'
         }).reset_index()
@@ -205,39 +200,39 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_vs_case_growth(self, country, visualization_type='chart'):
+    def plot_mobility_vs_case_growth(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                     interval='daily', population=None):
         """
         Generate the specified visualization for mobility vs. case growth analysis.
         """
-        data = self._process_mobility_vs_case_growth_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_vs_case_growth_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_vs_case_growth_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_mobility_vs_case_growth_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_mobility_vs_case_growth_table(data)
+            return label_units(self._plot_mobility_vs_case_growth_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_mobility_vs_policies_data(self, country):
+    def _process_mobility_vs_policies_data(self, country, start_date=None, end_date=None, interval='daily',
+                                           population=None):
         """
         Process data for mobility vs. policies analysis.
         """
-        merged_data = pd.merge(
-            self.mobility,
-            self.government_response,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country].copy()  # Use .copy() to avoid the warning
+        # Cut both datasets down to the country before joining
+        mobility = prepare(self.mobility, interval, population)
+        government_response = prepare(self.government_response, interval, population)
+        country_data = join_country(mobility, government_response, country, start_date, end_date)
 
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
 
         # Ensure correct data types using .loc
-        country_data.loc[:, 'date'] = pd.to_datetime(country_data['date'])
         country_data.loc[:, 'trend'] = pd.to_numeric(country_data['trend'])
         country_data.loc[:, 'stringency_index'] = pd.to_numeric(country_data['stringency_index'])
 
@@ -245,7 +240,7 @@ class MobilityAnalysis:
         country_data = country_data.dropna(subset=['trend', 'stringency_index'])
 
         # Aggregate data by date (if necessary) and retain the 'country' column
-        country_data_aggregated = country_data.groupby(['country', 'date']).agg({
+        country_data_aggregated = country_data.groupby(['country', 'date'], observed=True).agg({
             'trend': 'mean',
             'stringency_index': 'mean'
         }).reset_index()
@@ -267,7 +262,7 @@ class MobilityAnalysis:
         Generate a map for mobility vs. policies analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'trend': 'mean',
             'stringency_index': 'mean'
         }).reset_index()
@@ -291,33 +286,34 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_vs_policies(self, country, visualization_type='chart'):
+    def plot_mobility_vs_policies(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                  interval='daily', population=None):
         """
         Generate the specified visualization for mobility vs. policies analysis.
         """
-        data = self._process_mobility_vs_policies_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_vs_policies_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_vs_policies_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_mobility_vs_policies_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_mobility_vs_policies_table(data)
+            return label_units(self._plot_mobility_vs_policies_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_mobility_vs_vaccination_data(self, country):
+    def _process_mobility_vs_vaccination_data(self, country, start_date=None, end_date=None, interval='daily',
+                                              population=None):
         """
         Process data for mobility vs. vaccination analysis.
         """
-        merged_data = pd.merge(
-            self.mobility,
-            self.vaccinations,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        mobility = prepare(self.mobility, interval, population)
+        vaccinations = prepare(self.vaccinations, interval, population)
+        country_data = join_country(mobility, vaccinations, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -338,7 +334,7 @@ class MobilityAnalysis:
         Generate a map for mobility vs. vaccination analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'trend': 'mean'
         }).reset_index()
@@ -362,33 +358,34 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_vs_vaccination(self, country, visualization_type='chart'):
+    def plot_mobility_vs_vaccination(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                     interval='daily', population=None):
         """
         Generate the specified visualization for mobility vs. vaccination analysis.
         """
-        data = self._process_mobility_vs_vaccination_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_vs_vaccination_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_vs_vaccination_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_mobility_vs_vaccination_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_mobility_vs_vaccination_table(data)
+            return label_units(self._plot_mobility_vs_vaccination_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_mobility_vs_excess_mortality_data(self, country):
+    def _process_mobility_vs_excess_mortality_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                   population=None):
         """
         Process data for mobility vs. excess mortality analysis.
         """
-        merged_data = pd.merge(
-            self.mobility,
-            self.excess_mortality,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        mobility = prepare(self.mobility, interval, population)
+        excess_mortality = prepare(self.excess_mortality, interval, population)
+        country_data = join_country(mobility, excess_mortality, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -409,7 +406,7 @@ class MobilityAnalysis:
         Generate a map for mobility vs. excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'trend': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -433,22 +430,24 @@ class MobilityAnalysis:
         )
         return table
 
-    def plot_mobility_vs_excess_mortality(self, country, visualization_type='chart'):
+    def plot_mobility_vs_excess_mortality(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                          interval='daily', population=None):
         """
         Generate the specified visualization for mobility vs. excess mortality analysis.
         """
-        data = self._process_mobility_vs_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_mobility_vs_excess_mortality_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_mobility_vs_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_mobility_vs_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_mobility_vs_excess_mortality_table(data)
+            return label_units(self._plot_mobility_vs_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 # Example usage
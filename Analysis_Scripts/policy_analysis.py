@@ -1,40 +1,28 @@
-import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import LazyDataset, all_columns, country_rows, fact_rows, join_country, label_units, prepare
 
 
 class PolicyAnalysis:
-    def __init__(self):
+    government_response = LazyDataset('government_response')
+    mobility = LazyDataset('google_mobility')
+    vaccinations = LazyDataset('vaccinations_age')
+    country_daily = LazyDataset('country_daily')
+
+    def __init__(self, metrics=None):
         """
-        Initialize the PolicyAnalysis class with file paths.
+        Initialize the PolicyAnalysis class with the metrics it will plot.
         """
-        government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv'
-        cases_deaths_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-        mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.csv'
-        vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv'
-        excess_mortality_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv'
-
-        # Load datasets
-        self.government_response = pd.read_csv(government_response_path)
-        self.cases_deaths = pd.read_csv(cases_deaths_path)
-        self.mobility = pd.read_csv(mobility_path)
-        self.vaccinations = pd.read_csv(vaccinations_path)
-        self.excess_mortality = pd.read_csv(excess_mortality_path)
+        self.metrics = metrics
 
-        # Convert date columns to datetime
-        self.government_response['date'] = pd.to_datetime(self.government_response['date'])
-        self.cases_deaths['date'] = pd.to_datetime(self.cases_deaths['date'])
-        self.mobility['date'] = pd.to_datetime(self.mobility['date'])
-        self.vaccinations['date'] = pd.to_datetime(self.vaccinations['date'])
-        self.excess_mortality['date'] = pd.to_datetime(self.excess_mortality['date'])
-        self.excess_mortality.rename(columns={'entity': 'country'}, inplace=True)
-
-    def _process_policy_stringency_over_time_data(self, country):
+    def _process_policy_stringency_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                  population=None):
         """
         Process data for policy stringency over time analysis.
         """
-        country_data = self.government_response[self.government_response['country'] == country]
+        government_response = prepare(self.government_response, interval, population)
+        country_data = country_rows(government_response, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -54,7 +42,7 @@ class PolicyAnalysis:
         Generate a map for policy stringency over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'stringency_index': 'mean'
         }).reset_index()
 
@@ -77,33 +65,35 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_stringency_over_time(self, country, visualization_type='chart'):
+    def plot_policy_stringency_over_time(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                         interval='daily', population=None):
         """
         Generate the specified visualization for policy stringency over time analysis.
         """
-        data = self._process_policy_stringency_over_time_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_stringency_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_stringency_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_stringency_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_stringency_over_time_table(data)
+            return label_units(self._plot_policy_stringency_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_impact_on_cases_deaths_data(self, country):
+    def _process_policy_impact_on_cases_deaths_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                    population=None):
         """
         Process data for policy impact on cases and deaths analysis.
         """
-        merged_data = pd.merge(
-            self.government_response,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_daily = prepare(self.country_daily, interval, population)
+        country_data = fact_rows(country_daily, ['government_response', 'cases_deaths'], [
+            'country', 'date', 'stringency_index', 'new_cases_per_million', 'new_deaths_per_million'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -123,7 +113,7 @@ class PolicyAnalysis:
         Generate a map for policy impact on cases and deaths analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'stringency_index': 'mean',
             'new_cases_per_million': 'mean',
             'new_deaths_per_million': 'mean'
@@ -148,33 +138,34 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_impact_on_cases_deaths(self, country, visualization_type='chart'):
+    def plot_policy_impact_on_cases_deaths(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                           interval='daily', population=None):
         """
         Generate the specified visualization for policy impact on cases and deaths analysis.
         """
-        data = self._process_policy_impact_on_cases_deaths_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_impact_on_cases_deaths_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_impact_on_cases_deaths_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_impact_on_cases_deaths_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_impact_on_cases_deaths_table(data)
+            return label_units(self._plot_policy_impact_on_cases_deaths_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_impact_on_mobility_data(self, country):
+    def _process_policy_impact_on_mobility_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                population=None):
         """
         Process data for policy impact on mobility analysis.
         """
-        merged_data = pd.merge(
-            self.government_response,
-            self.mobility,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        government_response = prepare(self.government_response, interval, population)
+        mobility = prepare(self.mobility, interval, population)
+        country_data = join_country(government_response, mobility, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -194,7 +185,7 @@ class PolicyAnalysis:
         Generate a map for policy impact on mobility analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'stringency_index': 'mean',
             'trend': 'mean'
         }).reset_index()
@@ -218,33 +209,34 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_impact_on_mobility(self, country, visualization_type='chart'):
+    def plot_policy_impact_on_mobility(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                       interval='daily', population=None):
         """
         Generate the specified visualization for policy impact on mobility analysis.
         """
-        data = self._process_policy_impact_on_mobility_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_impact_on_mobility_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_impact_on_mobility_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_impact_on_mobility_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_impact_on_mobility_table(data)
+            return label_units(self._plot_policy_impact_on_mobility_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_impact_on_vaccination_data(self, country):
+    def _process_policy_impact_on_vaccination_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                   population=None):
         """
         Process data for policy impact on vaccination analysis.
         """
-        merged_data = pd.merge(
-            self.government_response,
-            self.vaccinations,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        government_response = prepare(self.government_response, interval, population)
+        vaccinations = prepare(self.vaccinations, interval, population)
+        country_data = join_country(government_response, vaccinations, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -264,7 +256,7 @@ class PolicyAnalysis:
         Generate a map for policy impact on vaccination analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'stringency_index': 'mean',
             'people_vaccinated_per_hundred': 'mean'
         }).reset_index()
@@ -288,33 +280,35 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_impact_on_vaccination(self, country, visualization_type='chart'):
+    def plot_policy_impact_on_vaccination(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                          interval='daily', population=None):
         """
         Generate the specified visualization for policy impact on vaccination analysis.
         """
-        data = self._process_policy_impact_on_vaccination_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_impact_on_vaccination_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_impact_on_vaccination_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_impact_on_vaccination_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_impact_on_vaccination_table(data)
+            return label_units(self._plot_policy_impact_on_vaccination_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_impact_on_excess_mortality_data(self, country):
+    def _process_policy_impact_on_excess_mortality_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                        population=None):
         """
         Process data for policy impact on excess mortality analysis.
         """
-        merged_data = pd.merge(
-            self.government_response,
-            self.excess_mortality,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_daily = prepare(self.country_daily, interval, population)
+        country_data = fact_rows(country_daily, ['government_response', 'excess_mortality'], [
+            'country', 'date', 'stringency_index', 'excess_proj_all_ages'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -334,7 +328,7 @@ class PolicyAnalysis:
         Generate a map for policy impact on excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'stringency_index': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -358,35 +352,39 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_impact_on_excess_mortality(self, country, visualization_type='chart'):
+    def plot_policy_impact_on_excess_mortality(self, country, visualization_type='chart', start_date=None,
+                                               end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for policy impact on excess mortality analysis.
         """
-        data = self._process_policy_impact_on_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_impact_on_excess_mortality_data(country, start_date, end_date, interval,
+                                                                        population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_impact_on_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_policy_impact_on_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_policy_impact_on_excess_mortality_table(data)
+            return label_units(self._plot_policy_impact_on_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_policy_effectiveness_by_country_data(self):
+    def _process_policy_effectiveness_by_country_data(self, start_date=None, end_date=None, interval='daily',
+                                                      population=None):
         """
         Process data for policy effectiveness by country analysis.
         """
-        merged_data = pd.merge(
-            self.government_response,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_daily = prepare(self.country_daily, interval, population)
+        merged_data = fact_rows(country_daily, ['government_response', 'cases_deaths'], [
+            'country', 'date', 'stringency_index', 'new_cases_per_million'],
+            start_date=start_date, end_date=end_date)
 
         # Calculate policy effectiveness (e.g., reduction in cases/deaths per unit of stringency)
-        policy_effectiveness = merged_data.groupby('country').apply(
+        policy_effectiveness = merged_data.groupby('country', observed=True).apply(
             lambda x: (x['new_cases_per_million'].max() - x['new_cases_per_million'].min()) / x[
                 'stringency_index'].max()
         ).reset_index(name='policy_effectiveness')
@@ -425,22 +423,24 @@ class PolicyAnalysis:
         )
         return table
 
-    def plot_policy_effectiveness_by_country(self, visualization_type='chart'):
+    def plot_policy_effectiveness_by_country(self, visualization_type='chart', start_date=None, end_date=None,
+                                             interval='daily', population=None):
         """
         Generate the specified visualization for policy effectiveness by country analysis.
         """
-        data = self._process_policy_effectiveness_by_country_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_policy_effectiveness_by_country_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_policy_effectiveness_by_country_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_policy_effectiveness_by_country_map(data)
         elif visualization_type == 'table':
-            return self._plot_policy_effectiveness_by_country_table(data)
+            return label_units(self._plot_policy_effectiveness_by_country_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 # Example usage
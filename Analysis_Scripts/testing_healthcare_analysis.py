@@ -2,37 +2,26 @@ import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import LazyDataset, all_columns, country_rows, country_summary, fact_rows, label_units, prepare
 
 
 class TestingHealthcareAnalysis:
-    def __init__(self):
+    testing = LazyDataset('testing')
+    healthcare = LazyDataset('hospital')
+    country_daily = LazyDataset('country_daily')
+
+    def __init__(self, metrics=None):
         """
-        Initialize the TestingHealthcareAnalysis class with file paths.
+        Initialize the TestingHealthcareAnalysis class with the metrics it will plot.
         """
-        testing_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\testing_cleaned.csv'
-        healthcare_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\hospital_cleaned.csv'
-        cases_deaths_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-        excess_mortality_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv'
-
-        # Load datasets
-        self.testing = pd.read_csv(testing_path)
-        self.healthcare = pd.read_csv(healthcare_path)
-        self.healthcare.columns = self.healthcare.columns.str.strip()
-        self.cases_deaths = pd.read_csv(cases_deaths_path)
-        self.excess_mortality = pd.read_csv(excess_mortality_path)
-
-        # Convert date columns to datetime
-        self.testing['date'] = pd.to_datetime(self.testing['date'])
-        self.healthcare['date'] = pd.to_datetime(self.healthcare['date'])
-        self.cases_deaths['date'] = pd.to_datetime(self.cases_deaths['date'])
-        self.excess_mortality['date'] = pd.to_datetime(self.excess_mortality['date'])
-        self.excess_mortality.rename(columns={'entity': 'country'}, inplace=True)
+        self.metrics = metrics
 
-    def _process_testing_rates_over_time_data(self, country):
+    def _process_testing_rates_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                              population=None):
         """
         Process data for testing rates over time analysis.
         """
-        country_data = self.testing[self.testing['country'] == country]
+        country_data = country_rows(prepare(self.testing, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -52,7 +41,7 @@ class TestingHealthcareAnalysis:
         Generate a map for testing rates over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_tests_per_thousand': 'mean'
         }).reset_index()
 
@@ -75,33 +64,34 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_testing_rates_over_time(self, country, visualization_type='chart'):
+    def plot_testing_rates_over_time(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                     interval='daily', population=None):
         """
         Generate the specified visualization for testing rates over time analysis.
         """
-        data = self._process_testing_rates_over_time_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_testing_rates_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_testing_rates_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_testing_rates_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_testing_rates_over_time_table(data)
+            return label_units(self._plot_testing_rates_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_testing_vs_case_detection_data(self, country):
+    def _process_testing_vs_case_detection_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                population=None):
         """
         Process data for testing vs. case detection analysis.
         """
-        merged_data = pd.merge(
-            self.testing,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_data = fact_rows(prepare(self.country_daily, interval, population), ['testing', 'cases_deaths'], [
+            'country', 'date', 'new_tests_per_thousand', 'new_cases_per_million'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -122,7 +112,7 @@ class TestingHealthcareAnalysis:
         Generate a map for testing vs. case detection analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'new_tests_per_thousand': 'mean',
             'new_cases_per_million': 'mean'
         }).reset_index()
@@ -146,28 +136,31 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_testing_vs_case_detection(self, country, visualization_type='chart'):
+    def plot_testing_vs_case_detection(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                       interval='daily', population=None):
         """
         Generate the specified visualization for testing vs. case detection analysis.
         """
-        data = self._process_testing_vs_case_detection_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_testing_vs_case_detection_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_testing_vs_case_detection_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_testing_vs_case_detection_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_testing_vs_case_detection_table(data)
+            return label_units(self._plot_testing_vs_case_detection_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_healthcare_capacity_over_time_data(self, country):
+    def _process_healthcare_capacity_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                    population=None):
         """
         Process data for healthcare capacity over time analysis.
         """
-        country_data = self.healthcare[self.healthcare['country'] == country]
+        country_data = country_rows(prepare(self.healthcare, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -187,7 +180,7 @@ class TestingHealthcareAnalysis:
         Generate a map for healthcare capacity over time analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'daily_occupancy_icu_per_1m': 'mean',
             'daily_occupancy_hosp_per_1m': 'mean'
         }).reset_index()
@@ -211,33 +204,34 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_healthcare_capacity_over_time(self, country, visualization_type='chart'):
+    def plot_healthcare_capacity_over_time(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                           interval='daily', population=None):
         """
         Generate the specified visualization for healthcare capacity over time analysis.
         """
-        data = self._process_healthcare_capacity_over_time_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_healthcare_capacity_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_healthcare_capacity_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_healthcare_capacity_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_healthcare_capacity_over_time_table(data)
+            return label_units(self._plot_healthcare_capacity_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_healthcare_capacity_vs_cfr_data(self, country):
+    def _process_healthcare_capacity_vs_cfr_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                 population=None):
         """
         Process data for healthcare capacity vs. case fatality rate (CFR) analysis.
         """
-        merged_data = pd.merge(
-            self.healthcare,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_data = fact_rows(prepare(self.country_daily, interval, population), ['hospital', 'cases_deaths'], [
+            'country', 'date', 'daily_occupancy_icu_per_1m', 'cfr'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -258,7 +252,7 @@ class TestingHealthcareAnalysis:
         Generate a map for healthcare capacity vs. case fatality rate (CFR) analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'daily_occupancy_icu_per_1m': 'mean',
             'cfr': 'mean'
         }).reset_index()
@@ -282,33 +276,34 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_healthcare_capacity_vs_cfr(self, country, visualization_type='chart'):
+    def plot_healthcare_capacity_vs_cfr(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                        interval='daily', population=None):
         """
         Generate the specified visualization for healthcare capacity vs. case fatality rate (CFR) analysis.
         """
-        data = self._process_healthcare_capacity_vs_cfr_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_healthcare_capacity_vs_cfr_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_healthcare_capacity_vs_cfr_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_healthcare_capacity_vs_cfr_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_healthcare_capacity_vs_cfr_table(data)
+            return label_units(self._plot_healthcare_capacity_vs_cfr_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_healthcare_capacity_vs_excess_mortality_data(self, country):
+    def _process_healthcare_capacity_vs_excess_mortality_data(self, country, start_date=None, end_date=None,
+                                                              interval='daily', population=None):
         """
         Process data for healthcare capacity vs. excess mortality analysis.
         """
-        merged_data = pd.merge(
-            self.healthcare,
-            self.excess_mortality,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Rows with both datasets, sliced from the prebuilt fact table instead of joined here
+        country_data = fact_rows(prepare(self.country_daily, interval, population), ['hospital', 'excess_mortality'], [
+            'country', 'date', 'daily_occupancy_icu_per_1m', 'excess_proj_all_ages'],
+            country=country, start_date=start_date, end_date=end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -329,7 +324,7 @@ class TestingHealthcareAnalysis:
         Generate a map for healthcare capacity vs. excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'daily_occupancy_icu_per_1m': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -353,30 +348,40 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_healthcare_capacity_vs_excess_mortality(self, country, visualization_type='chart'):
+    def plot_healthcare_capacity_vs_excess_mortality(self, country, visualization_type='chart', start_date=None,
+                                                     end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for healthcare capacity vs. excess mortality analysis.
         """
-        data = self._process_healthcare_capacity_vs_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_healthcare_capacity_vs_excess_mortality_data(country, start_date, end_date, interval,
+                                                                              population)
 
         if visualization_type == 'chart':
             fig = self._plot_healthcare_capacity_vs_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_healthcare_capacity_vs_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_healthcare_capacity_vs_excess_mortality_table(data)
+            return label_units(self._plot_healthcare_capacity_vs_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_testing_healthcare_by_country_data(self):
+    def _process_testing_healthcare_by_country_data(self, start_date=None, end_date=None, interval='daily',
+                                                    population=None):
         """
         Process data for testing and healthcare capacity by country analysis.
         """
         # Aggregate testing and healthcare data by country
-        testing_by_country = self.testing.groupby('country')['new_tests_per_thousand'].max().reset_index()
-        healthcare_by_country = self.healthcare.groupby('country')['daily_occupancy_icu_per_1m'].max().reset_index()
+        testing = country_summary(prepare(self.testing, interval, population), start_date, end_date,
+                                  columns=['new_tests_per_thousand'])
+        healthcare = country_summary(prepare(self.healthcare, interval, population), start_date, end_date,
+                                     columns=['daily_occupancy_icu_per_1m'])
+        testing_by_country = testing[['country', 'new_tests_per_thousand_max']].rename(
+            columns={'new_tests_per_thousand_max': 'new_tests_per_thousand'})
+        healthcare_by_country = healthcare[['country', 'daily_occupancy_icu_per_1m_max']].rename(
+            columns={'daily_occupancy_icu_per_1m_max': 'daily_occupancy_icu_per_1m'})
 
         # Merge testing and healthcare data
         merged_data = pd.merge(testing_by_country, healthcare_by_country, on='country')
@@ -415,22 +420,24 @@ class TestingHealthcareAnalysis:
         )
         return table
 
-    def plot_testing_healthcare_by_country(self, visualization_type='chart'):
+    def plot_testing_healthcare_by_country(self, visualization_type='chart', start_date=None, end_date=None,
+                                           interval='daily', population=None):
         """
         Generate the specified visualization for testing and healthcare capacity by country analysis.
         """
-        data = self._process_testing_healthcare_by_country_data()
+        with all_columns(visualization_type == 'table'):
+            data = self._process_testing_healthcare_by_country_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_testing_healthcare_by_country_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_testing_healthcare_by_country_map(data)
         elif visualization_type == 'table':
-            return self._plot_testing_healthcare_by_country_table(data)
+            return label_units(self._plot_testing_healthcare_by_country_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 # Example usage
@@ -1,51 +1,35 @@
-import pandas as pd
 import plotly.express as px
 from dash import Dash, html, dash_table
 from dash import dcc
+from data_store import (LazyDataset, all_columns, country_rows, date_rows, join_country, label_units,
+                        normalized_unit, prepare)
 
 
 class VaccinationAnalysis:
-    def __init__(self):
-        """
-        Initialize the VaccinationAnalysis class with file paths.
-        """
-        # File paths
-        global_vaccinations = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv'
-        us_vaccination = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_us_cleaned.csv'
-        attitudes = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Attitudes_cleaned.csv'
-        manufacture = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_manufacturer_cleaned.csv'
-        cases_death = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-        reproduction_rate = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\reproduction_rate_cleaned.csv'
-        excess_mortality = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv'
-
-        # Load datasets
-        self.global_vaccination = pd.read_csv(global_vaccinations)
-        self.us_vaccination = pd.read_csv(us_vaccination)
-        self.attitudes = pd.read_csv(attitudes)
-        self.manufacturer_data = pd.read_csv(manufacture)
-        self.cases_deaths = pd.read_csv(cases_death)
-        self.reproduction_rate = pd.read_csv(reproduction_rate)
-        self.excess_mortality = pd.read_csv(excess_mortality)
-
-        # Convert data columns to datetime
-        self.global_vaccination['date'] = pd.to_datetime(self.global_vaccination['date'])
-        self.us_vaccination['date'] = pd.to_datetime(self.us_vaccination['date'])
-        self.attitudes['date'] = pd.to_datetime(self.attitudes['date'])
-        self.manufacturer_data['date'] = pd.to_datetime(self.manufacturer_data['date'])
-        self.cases_deaths['date'] = pd.to_datetime(self.cases_deaths['date'])
-        self.reproduction_rate['date'] = pd.to_datetime(self.reproduction_rate['date'])
-
-        self.excess_mortality['date'] = pd.to_datetime(self.excess_mortality['date'])
-        self.excess_mortality.rename(columns={'entity': 'country'}, inplace=True)
-
-    def _process_vaccination_rates_over_time_data(self, country):
+    global_vaccination = LazyDataset('vaccinations_age')
+    us_vaccination = LazyDataset('vaccinations_us')
+    attitudes = LazyDataset('attitudes')
+    manufacturer_data = LazyDataset('vaccinations_manufacturer')
+    cases_deaths = LazyDataset('cases_deaths')
+    reproduction_rate = LazyDataset('reproduction_rate')
+    excess_mortality = LazyDataset('excess_mortality')
+
+    def __init__(self, metrics=None):
+        """
+        Initialize the VaccinationAnalysis class with the metrics it will plot.
+        """
+        self.metrics = metrics
+
+    def _process_vaccination_rates_over_time_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                  population=None):
         """
         Process data for vaccination rates over time analysis.
         """
         if country == 'United States':
-            data = self.us_vaccination
+            data = prepare(self.us_vaccination, interval, population, column='state')
+            data = date_rows(data, start_date, end_date, column='state')
         else:
-            data = self.global_vaccination[self.global_vaccination['country'] == country]
+            data = country_rows(prepare(self.global_vaccination, interval, population), country, start_date, end_date)
             if data.empty:
                 raise ValueError(f"No data available for {country}.")
         return data
@@ -66,7 +50,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination rates over time analysis, focusing on the selected country.
         """
         # Filter data for the selected country
-        country_data = data[data['country'] == country]
+        country_data = country_rows(data, country)
 
         # Create a choropleth map focused on the selected country
         fig = px.choropleth(country_data, locations='country', locationmode='country names',
@@ -87,28 +71,34 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_rates_over_time(self, country='Argentina', visualization_type='chart'):
+    def plot_vaccination_rates_over_time(self, country='Argentina', visualization_type='chart', start_date=None,
+                                         end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for vaccination rates over time analysis.
         """
-        data = self._process_vaccination_rates_over_time_data(country)
+        if country == 'United States':
+            # State rows are never converted (see normalized_unit), so their labels are kept too
+            population = normalized_unit(self.us_vaccination, population)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_rates_over_time_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_rates_over_time_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_rates_over_time_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_rates_over_time_table(data)
+            return label_units(self._plot_vaccination_rates_over_time_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_attitudes_data(self, country):
+    def _process_vaccination_attitudes_data(self, country, start_date=None, end_date=None, interval='daily',
+                                            population=None):
         """
         Process data for vaccination attitudes analysis.
         """
-        country_data = self.attitudes[self.attitudes['country'] == country]
+        country_data = country_rows(prepare(self.attitudes, interval, population), country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -130,7 +120,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination attitudes analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'willingness_covid_vaccinate_this_week_pct_pop': 'mean',
             'uncertain_covid_vaccinate_this_week_pct_pop': 'mean',
             'unwillingness_covid_vaccinate_this_week_pct_pop': 'mean'
@@ -155,37 +145,44 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_attitudes(self, country='Australia', visualization_type='chart'):
+    def plot_vaccination_attitudes(self, country='Australia', visualization_type='chart', start_date=None,
+                                   end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for vaccination attitudes analysis.
         """
-        data = self._process_vaccination_attitudes_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_attitudes_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_attitudes_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_attitudes_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_attitudes_table(data)
+            return label_units(self._plot_vaccination_attitudes_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_by_age_group_data(self, country, date='2023-01-01'):
+    def _process_vaccination_by_age_group_data(self, country, date='2023-01-01', start_date=None, end_date=None):
         """
-        Process data for vaccination by age group analysis.
+        Process data for vaccination by age group analysis: the rows of the
+        given date, or with a date window, of its last day with data.
         """
         if country == 'United States':
             raise ValueError("Age group data not available for the United States in this dataset.")
 
-        age_data = self.global_vaccination[
-            (self.global_vaccination['country'] == country) &
-            (self.global_vaccination['date'] == date)
-            ]
-        if age_data.empty:
-            raise ValueError(f"No data available for {country} on {date}.")
-        return age_data
+        if start_date is None and end_date is None:
+            age_data = country_rows(self.global_vaccination, country, start_date=date, end_date=date)
+            if age_data.empty:
+                raise ValueError(f"No data available for {country} on {date}.")
+            return age_data
+
+        window = country_rows(self.global_vaccination, country, start_date, end_date)
+        if window.empty:
+            raise ValueError(f"No data available for {country} between {start_date} and {end_date}.")
+        # Rows are sorted by date, so the last day's rows (one per age group) end the window
+        return window.iloc[window['date'].searchsorted(window['date'].iloc[-1]):]
 
     def _plot_vaccination_by_age_group_chart(self, data, country, date):
         """
@@ -202,7 +199,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination by age group analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'people_fully_vaccinated_per_hundred': 'mean'
         }).reset_index()
@@ -226,28 +223,36 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_by_age_group(self, country, date='2023-01-01', visualization_type='chart'):
+    def plot_vaccination_by_age_group(self, country, date='2023-01-01', visualization_type='chart', start_date=None,
+                                      end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for vaccination by age group analysis.
+        A date window shows the age groups on its last day with data; the ages
+        are always shown for a single day, whatever the interval.
         """
-        data = self._process_vaccination_by_age_group_data(country, date)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_by_age_group_data(country, date, start_date, end_date)
+        if start_date is not None or end_date is not None:
+            date = data['date'].iloc[-1].strftime('%Y-%m-%d')
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_by_age_group_chart(data, country, date)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_by_age_group_map(data, country, date)
         elif visualization_type == 'table':
-            return self._plot_vaccination_by_age_group_table(data)
+            return label_units(self._plot_vaccination_by_age_group_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_by_manufacturer_data(self, country):
+    def _process_vaccination_by_manufacturer_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                  population=None):
         """
         Process data for vaccination by manufacturer analysis.
         """
-        country_data = self.manufacturer_data[self.manufacturer_data['country'] == country]
+        manufacturer_data = prepare(self.manufacturer_data, interval, population)
+        country_data = country_rows(manufacturer_data, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -267,7 +272,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination by manufacturer analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'total_vaccinations': 'sum'
         }).reset_index()
 
@@ -290,40 +295,40 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_by_manufacturer(self, country='Argentina', visualization_type='chart'):
+    def plot_vaccination_by_manufacturer(self, country='Argentina', visualization_type='chart', start_date=None,
+                                         end_date=None, interval='daily', population=None):
         """
         Generate the specified visualization for vaccination by manufacturer analysis.
         """
-        data = self._process_vaccination_by_manufacturer_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_by_manufacturer_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_by_manufacturer_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_by_manufacturer_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_by_manufacturer_table(data)
+            return label_units(self._plot_vaccination_by_manufacturer_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_vs_cfr_data(self, country):
+    def _process_vaccination_vs_cfr_data(self, country, start_date=None, end_date=None, interval='daily',
+                                         population=None):
         """
         Process data for vaccination vs. CFR analysis.
         """
         if country == 'United States':
-            vaccination_data = self.us_vaccination
-            vaccination_data['country'] = 'United States'  # Add country column for merging
+            # Add country column for merging (on a new frame, the shared dataset stays untouched)
+            us_vaccination = prepare(self.us_vaccination, interval, population, column='state')
+            vaccination_data = us_vaccination.assign(country='United States')
         else:
-            vaccination_data = self.global_vaccination
+            vaccination_data = prepare(self.global_vaccination, interval, population)
 
-        # Merge vaccination data with case and death data
-        merged_data = pd.merge(
-            vaccination_data,
-            self.cases_deaths,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Merge vaccination data with case and death data, cut down to the country first
+        cases_deaths = prepare(self.cases_deaths, interval, population)
+        country_data = join_country(vaccination_data, cases_deaths, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -344,7 +349,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination vs. CFR analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'cfr': 'mean'
         }).reset_index()
@@ -368,33 +373,37 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_vs_cfr(self, country, visualization_type='chart'):
+    def plot_vaccination_vs_cfr(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                interval='daily', population=None):
         """
         Generate the specified visualization for vaccination vs. CFR analysis.
         """
-        data = self._process_vaccination_vs_cfr_data(country)
+        if country == 'United States':
+            # State rows are never converted (see normalized_unit), so their labels are kept too
+            population = normalized_unit(self.us_vaccination, population)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_vs_cfr_data(country, start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_vs_cfr_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_vs_cfr_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_vs_cfr_table(data)
+            return label_units(self._plot_vaccination_vs_cfr_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_vs_reproduction_rate_data(self, country):
+    def _process_vaccination_vs_reproduction_rate_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                       population=None):
         """
         Process data for vaccination vs. reproduction rate analysis.
         """
-        merged_data = pd.merge(
-            self.global_vaccination,
-            self.reproduction_rate,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        global_vaccination = prepare(self.global_vaccination, interval, population)
+        reproduction_rate = prepare(self.reproduction_rate, interval, population)
+        country_data = join_country(global_vaccination, reproduction_rate, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -414,7 +423,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination vs. reproduction rate analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'r': 'mean'
         }).reset_index()
@@ -438,33 +447,35 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_vs_reproduction_rate(self, country, visualization_type='chart'):
+    def plot_vaccination_vs_reproduction_rate(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                              interval='daily', population=None):
         """
         Generate the specified visualization for vaccination vs. reproduction rate analysis.
         """
-        data = self._process_vaccination_vs_reproduction_rate_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_vs_reproduction_rate_data(country, start_date, end_date, interval,
+                                                                       population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_vs_reproduction_rate_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_vs_reproduction_rate_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_vs_reproduction_rate_table(data)
+            return label_units(self._plot_vaccination_vs_reproduction_rate_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_vaccination_vs_excess_mortality_data(self, country):
+    def _process_vaccination_vs_excess_mortality_data(self, country, start_date=None, end_date=None, interval='daily',
+                                                      population=None):
         """
         Process data for vaccination vs. excess mortality analysis.
         """
-        merged_data = pd.merge(
-            self.global_vaccination,
-            self.excess_mortality,
-            on=['country', 'date']
-        )
-        country_data = merged_data[merged_data['country'] == country]
+        # Cut both datasets down to the country before joining
+        global_vaccination = prepare(self.global_vaccination, interval, population)
+        excess_mortality = prepare(self.excess_mortality, interval, population)
+        country_data = join_country(global_vaccination, excess_mortality, country, start_date, end_date)
         if country_data.empty:
             raise ValueError(f"No data available for {country}.")
         return country_data
@@ -485,7 +496,7 @@ class VaccinationAnalysis:
         Generate a map for vaccination vs. excess mortality analysis.
         """
         # Aggregate data by country for the map
-        aggregated_data = data.groupby('country').agg({
+        aggregated_data = data.groupby('country', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'excess_proj_all_ages': 'mean'
         }).reset_index()
@@ -509,28 +520,32 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_vaccination_vs_excess_mortality(self, country, visualization_type='chart'):
+    def plot_vaccination_vs_excess_mortality(self, country, visualization_type='chart', start_date=None, end_date=None,
+                                             interval='daily', population=None):
         """
         Generate the specified visualization for vaccination vs. excess mortality analysis.
         """
-        data = self._process_vaccination_vs_excess_mortality_data(country)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_vaccination_vs_excess_mortality_data(country, start_date, end_date, interval,
+                                                                      population)
 
         if visualization_type == 'chart':
             fig = self._plot_vaccination_vs_excess_mortality_chart(data, country)
         elif visualization_type == 'map':
             fig = self._plot_vaccination_vs_excess_mortality_map(data, country)
         elif visualization_type == 'table':
-            return self._plot_vaccination_vs_excess_mortality_table(data)
+            return label_units(self._plot_vaccination_vs_excess_mortality_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
-    def _process_us_vaccination_trends_data(self):
+    def _process_us_vaccination_trends_data(self, start_date=None, end_date=None, interval='daily', population=None):
         """
         Process data for US vaccination trends analysis.
         """
-        return self.us_vaccination
+        us_vaccination = prepare(self.us_vaccination, interval, population, column='state')
+        return date_rows(us_vaccination, start_date, end_date, column='state')
 
     def _plot_us_vaccination_trends_chart(self, data):
         """
@@ -548,7 +563,7 @@ class VaccinationAnalysis:
         Generate a map for US vaccination trends analysis.
         """
         # Aggregate data by state for the map
-        aggregated_data = data.groupby('state').agg({
+        aggregated_data = data.groupby('state', observed=True).agg({
             'people_vaccinated_per_hundred': 'mean',
             'people_fully_vaccinated_per_hundred': 'mean',
             'total_boosters_per_hundred': 'mean'
@@ -594,22 +609,26 @@ class VaccinationAnalysis:
         )
         return table
 
-    def plot_us_vaccination_trends(self, visualization_type='chart'):
+    def plot_us_vaccination_trends(self, visualization_type='chart', start_date=None, end_date=None, interval='daily',
+                                   population=None):
         """
         Generate the specified visualization for US vaccination trends analysis.
         """
-        data = self._process_us_vaccination_trends_data()
+        # State rows are never converted (see normalized_unit), so their labels are kept too
+        population = normalized_unit(self.us_vaccination, population)
+        with all_columns(visualization_type == 'table'):
+            data = self._process_us_vaccination_trends_data(start_date, end_date, interval, population)
 
         if visualization_type == 'chart':
             fig = self._plot_us_vaccination_trends_chart(data)
         elif visualization_type == 'map':
             fig = self._plot_us_vaccination_trends_map(data)
         elif visualization_type == 'table':
-            return self._plot_us_vaccination_trends_table(data)
+            return label_units(self._plot_us_vaccination_trends_table(data), population)
         else:
             raise ValueError("Invalid visualization type. Choose 'chart', 'map', or 'table'.")
 
-        return dcc.Graph(figure=fig)
+        return dcc.Graph(figure=label_units(fig, population))
 
 
 if __name__ == "__main__":
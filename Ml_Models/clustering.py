@@ -116,21 +116,15 @@ def main():
         'mobility': ['country', 'date', 'trend']
     }
 
-    cases_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-    vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv'
-    government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv'
-    mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.csv'
-
-    cases_data = pd.read_csv(cases_path, usecols=required_columns['cases_deaths'])
-    vaccinations_data = pd.read_csv(vaccinations_path, usecols=required_columns['vaccinations'])
-    government_response_data = pd.read_csv(government_response_path, usecols=required_columns['government_response'])
-    mobility_data = pd.read_csv(mobility_path, usecols=required_columns['mobility'])
-
-    # Convert date columns to datetime
-    cases_data['date'] = pd.to_datetime(cases_data['date'])
-    vaccinations_data['date'] = pd.to_datetime(vaccinations_data['date'])
-    government_response_data['date'] = pd.to_datetime(government_response_data['date'])
-    mobility_data['date'] = pd.to_datetime(mobility_data['date'])
+    cases_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.parquet'
+    vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.parquet'
+    government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.parquet'
+    mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.parquet'
+
+    cases_data = pd.read_parquet(cases_path, columns=required_columns['cases_deaths'])
+    vaccinations_data = pd.read_parquet(vaccinations_path, columns=required_columns['vaccinations'])
+    government_response_data = pd.read_parquet(government_response_path, columns=required_columns['government_response'])
+    mobility_data = pd.read_parquet(mobility_path, columns=required_columns['mobility'])
 
     # Merge datasets
     merged_data = pd.merge(cases_data, vaccinations_data, on=['country', 'date'], how='inner')
@@ -138,7 +132,7 @@ def main():
     merged_data = pd.merge(merged_data, mobility_data, on=['country', 'date'], how='inner')
 
     # Aggregate data by country (e.g., mean values)
-    aggregated_data = merged_data.groupby('country').mean().reset_index()
+    aggregated_data = merged_data.groupby('country', observed=True).mean().reset_index()
 
     # Perform clustering
     clustered_data = cluster_countries(aggregated_data)
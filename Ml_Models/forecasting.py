@@ -1,3 +1,5 @@
+import sys
+
 from prophet import Prophet
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -126,29 +128,30 @@ def forecast_excess_mortality(ts_forecasting, country='United States'):
     ts_forecasting.save_model('prophet_mortality_model.pkl')
 
 
-# Main Function
-def main():
-    # Load datasets
-    cases_data = pd.read_csv('F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv')
-    cases_data['date'] = pd.to_datetime(cases_data['date'])
+# Folder holding the cleaned datasets
+CLEANED_DIR = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\'
 
-    vaccinations_data = pd.read_csv('F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv')
-    vaccinations_data['date'] = pd.to_datetime(vaccinations_data['date'])
+# Models main() can fit: {name: (cleaned file, forecast helper, country)}
+FORECASTS = {
+    'cases': ('cases_deaths_cleaned.parquet', forecast_cases, 'United States'),
+    'vaccinations': ('vaccinations_age_cleaned_new.parquet', forecast_vaccinations, 'Argentina'),
+    'mortality': ('excess_mortality_cleaned.parquet', forecast_excess_mortality, 'United States'),
+}
 
-    excess_mortality_data = pd.read_csv('F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\excess_mortality_cleaned.csv')
-    excess_mortality_data['date'] = pd.to_datetime(excess_mortality_data['date'])
-    excess_mortality_data.rename(columns={'entity': 'country'}, inplace=True)
 
-    # Initialize the TimeSeriesForecasting class for each dataset
-    # ts_cases = TimeSeriesForecasting(cases_data)
-    # ts_vaccinations = TimeSeriesForecasting(vaccinations_data)
-    ts_mortality = TimeSeriesForecasting(excess_mortality_data)
+# Main Function
+def main(models=('mortality',)):
+    for name in models:
+        if name not in FORECASTS:
+            raise ValueError(f"Unknown model '{name}', expected one of {list(FORECASTS)}.")
 
-    # Perform forecasting for each dataset
-    # forecast_cases(ts_cases, country='United States')
-    # forecast_vaccinations(ts_vaccinations, country='Argentina')
-    forecast_excess_mortality(ts_mortality, country='United States')
+    for name in models:
+        # Load the dataset and fit its model
+        file_name, forecast, country = FORECASTS[name]
+        data = pd.read_parquet(CLEANED_DIR + file_name).rename(columns={'entity': 'country'})
+        forecast(TimeSeriesForecasting(data), country=country)
 
 
 if __name__ == "__main__":
-    main()
+    # Model names on the command line (cases, vaccinations, mortality) fit only those models
+    main(sys.argv[1:] or ['mortality'])
@@ -163,22 +163,16 @@ def analyze_mobility_vs_case_growth(regression_analysis, country='United States'
 # Main Function
 def main():
     # File paths
-    cases_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.csv'
-    vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.csv'
-    government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.csv'
-    mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.csv'
+    cases_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\cases_deaths_cleaned.parquet'
+    vaccinations_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\vaccinations_age_cleaned_new.parquet'
+    government_response_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\Government_response_policy_cleaned.parquet'
+    mobility_path = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\google_mobility_cleaned.parquet'
 
     # Load datasets with only required columns
-    cases_data = pd.read_csv(cases_path, usecols=required_columns['cases_deaths'])
-    vaccinations_data = pd.read_csv(vaccinations_path, usecols=required_columns['vaccinations'])
-    government_response_data = pd.read_csv(government_response_path, usecols=required_columns['government_response'])
-    mobility_data = pd.read_csv(mobility_path, usecols=required_columns['mobility'])
-
-    # Convert date columns to datetime
-    cases_data['date'] = pd.to_datetime(cases_data['date'])
-    vaccinations_data['date'] = pd.to_datetime(vaccinations_data['date'])
-    government_response_data['date'] = pd.to_datetime(government_response_data['date'])
-    mobility_data['date'] = pd.to_datetime(mobility_data['date'])
+    cases_data = pd.read_parquet(cases_path, columns=required_columns['cases_deaths'])
+    vaccinations_data = pd.read_parquet(vaccinations_path, columns=required_columns['vaccinations'])
+    government_response_data = pd.read_parquet(government_response_path, columns=required_columns['government_response'])
+    mobility_data = pd.read_parquet(mobility_path, columns=required_columns['mobility'])
 
     # Merge datasets
     merged_data = pd.merge(cases_data, vaccinations_data, on=['country', 'date'], how='inner')
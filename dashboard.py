@@ -8,6 +8,7 @@ from policy_analysis import PolicyAnalysis
 from testing_healthcare_analysis import TestingHealthcareAnalysis
 from excess_mortality_analysis import ExcessMortalityAnalysis
 from mobility_analysis import MobilityAnalysis
+from data_store import get_data_store
 
 # List of countries
 countries = [
@@ -151,10 +152,22 @@ app.layout = html.Div([
                 dcc.Dropdown(
                     id='population-dropdown',
                     options=[
-                        {'label': 'Per million', 'value': 'per_million'},
-                        {'label': 'Total', 'value': 'total'}
+                        {'label': 'As reported', 'value': 'as_reported'},
+                        {'label': 'Total', 'value': 'total'},
+                        {'label': 'Per thousand', 'value': 'per_thousand'},
+                        {'label': 'Per 100k', 'value': 'per_100k'},
+                        {'label': 'Per million', 'value': 'per_million'}
                     ],
-                    value='per_million',  # Default value
+                    value='as_reported',  # Default value
+                    style={'width': '100%'}
+                ),
+
+                # Date Range (left empty, the full history is shown)
+                html.Label("Date range", style={'font-weight': 'bold', 'color': '#495057', 'margin-top': '10px'}),
+                dcc.DatePickerRange(
+                    id='date-range',
+                    display_format='YYYY-MM-DD',
+                    clearable=True,
                     style={'width': '100%'}
                 )
             ], style={'margin-top': '20px'})
@@ -427,9 +440,14 @@ metric_to_function = {
     Output('visualization-display', 'children'),
     [Input('metric-dropdown', 'value'),
      Input('country-checklist', 'value'),
-     Input('visualization-tabs', 'value')]
+     Input('visualization-tabs', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('interval-dropdown', 'value'),
+     Input('population-dropdown', 'value')]
 )
-def update_visualization(selected_metric, selected_countries, visualization_type):
+def update_visualization(selected_metric, selected_countries, visualization_type, start_date, end_date, interval,
+                         population):
     if not selected_metric or not selected_countries:
         return "Please select a metric and at least one country."
 
@@ -440,6 +458,10 @@ def update_visualization(selected_metric, selected_countries, visualization_type
 
     analysis_function = metric_info['function']
     requires_country = metric_info['requires_country']
+    # Weekly and monthly rows come pre-aggregated from data_store.rollup
+    interval = interval or 'daily'
+    # Counts converted once per dataset and unit by data_store.normalize ('As reported' converts nothing)
+    population = None if population in (None, 'as_reported') else population
 
     # Generate visualizations
     visualizations = []
@@ -447,10 +469,14 @@ def update_visualization(selected_metric, selected_countries, visualization_type
         try:
             if requires_country:
                 # Call the function with 'country' parameter
-                visualization = analysis_function(country=country, visualization_type=visualization_type)
+                visualization = analysis_function(country=country, visualization_type=visualization_type,
+                                                  start_date=start_date, end_date=end_date, interval=interval,
+                                                  population=population)
             else:
                 # Call the function without 'country' parameter
-                visualization = analysis_function(visualization_type=visualization_type)
+                visualization = analysis_function(visualization_type=visualization_type,
+                                                  start_date=start_date, end_date=end_date, interval=interval,
+                                                  population=population)
 
             # Add the visualization to the list
             visualizations.append(visualization)
@@ -478,4 +504,6 @@ def update_visualization(selected_metric, selected_countries, visualization_type
 
 # Run the app
 if __name__ == "__main__":
+    # Confirm the cleaned files carry parsed dates, so serving never parses date strings
+    print(get_data_store().date_parsing_report())
     app.run(debug=True)
@@ -0,0 +1,89 @@
+# benchmark_cleaning.py
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from cleaning_specs import CLEANING_SPECS
+from data_cleaner import clean_dataset, standardize_text
+
+# Compares clean_dataset with the multi-pass version it replaced on a synthetic file
+# with the cases_deaths schema. Usage: python benchmark_cleaning.py [rows]
+
+
+def previous_clean_dataset(df, date_columns=None, numeric_columns=None, text_columns=None):
+    """
+    The clean_dataset before the single-pass engine: fill, deduplicate and
+    convert the whole frame in separate passes.
+    """
+    df.fillna(0, inplace=True)
+    df.drop_duplicates(inplace=True)
+    for col in date_columns or []:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in numeric_columns or []:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in text_columns or []:
+        df[col] = standardize_text(df[col])
+    return df
+
+
+def synthetic_raw(rows, countries=250, gaps=0.3, duplicates=0.01, seed=0):
+    """
+    Returns a raw frame with the cases_deaths columns as read_csv gives them:
+    'country' and 'date' as text, a share of gaps in every number, and a share
+    of rows repeated.
+    """
+    spec = CLEANING_SPECS['cases_deaths']
+    rng = np.random.default_rng(seed)
+    unique = rows - int(rows * duplicates)
+    days = -(-unique // countries)
+    df = pd.DataFrame({
+        'country': np.repeat([f'country {i}' for i in range(countries)], days)[:unique],
+        'date': np.tile(pd.date_range('2020-01-01', periods=days).strftime('%Y-%m-%d'), countries)[:unique],
+    })
+    for col in spec['numeric_columns']:
+        values = rng.gamma(2.0, 100.0, unique)
+        values[rng.random(unique) < gaps] = np.nan
+        df[col] = values
+    repeated = df.iloc[rng.integers(0, unique, rows - unique)]
+    return pd.concat([df, repeated], ignore_index=True)
+
+
+def measure(function, df):
+    """
+    Returns the result of function(df), its wall time in seconds and its peak traced memory in MiB.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(df)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark(rows=400000):
+    """
+    Cleans the same synthetic file with both functions and prints their time,
+    peak memory and whether their results are identical.
+    """
+    spec = CLEANING_SPECS['cases_deaths']
+    columns = {key: spec[key] for key in ('date_columns', 'numeric_columns', 'text_columns')}
+    raw = synthetic_raw(rows)
+    print(f"{len(raw)} rows, raw frame {raw.memory_usage(deep=True).sum() / 2**20:.0f} MiB")
+
+    # The previous function works in place, so it gets its own copy
+    previous, previous_seconds, previous_peak = measure(lambda df: previous_clean_dataset(df, **columns), raw.copy())
+    current, current_seconds, current_peak = measure(lambda df: clean_dataset(df, **columns), raw)
+    print(f"previous: {previous_seconds:.2f} s, peak {previous_peak:.0f} MiB")
+    print(f"current:  {current_seconds:.2f} s, peak {current_peak:.0f} MiB")
+
+    identical = previous.reset_index(drop=True).equals(current.reset_index(drop=True))
+    print(f"identical output: {identical}")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 400000)
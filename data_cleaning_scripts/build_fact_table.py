@@ -0,0 +1,39 @@
+# build_fact_table.py
+
+import pandas as pd
+from data_cleaner import build_fact_table, derived_version, read_data_version, save_dataset
+
+# Run after the cleaning scripts: joins the cleaned datasets that hold one row per (country, date).
+# Mobility (one row per place) and vaccinations by age group (one row per age group) are not
+# one row per (country, date), so they stay in their own files.
+cleaned_dir = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\'
+source_files = {
+    'cases_deaths': 'cases_deaths_cleaned.parquet',
+    'government_response': 'Government_response_policy_cleaned.parquet',
+    'testing': 'testing_cleaned.parquet',
+    'hospital': 'hospital_cleaned.parquet',
+    'reproduction_rate': 'reproduction_rate_cleaned.parquet',
+    'excess_mortality': 'excess_mortality_cleaned.parquet',
+}
+
+# Load the cleaned datasets
+sources = {}
+for name, file_name in source_files.items():
+    data = pd.read_parquet(cleaned_dir + file_name)
+    data.columns = data.columns.str.strip()
+    sources[name] = data.rename(columns={'entity': 'country'})
+
+# The analysis classes do not use the hospital country code; keep it out of the fact table
+sources['hospital'] = sources['hospital'].drop(columns=['country_code'])
+
+# Join them into one table keyed by (country, date)
+country_daily = build_fact_table(sources)
+
+# Its data version follows the versions of the datasets it joins (None if any has none)
+data_version = derived_version([read_data_version(cleaned_dir + file_name) for file_name in source_files.values()])
+
+# Save the fact table next to the cleaned datasets
+output_path = cleaned_dir + 'country_daily_cleaned.parquet'
+save_dataset(country_daily, output_path, data_version=data_version)
+
+print("Fact table built and saved!")
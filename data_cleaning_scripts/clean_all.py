@@ -0,0 +1,254 @@
+# clean_all.py
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from graphlib import TopologicalSorter
+
+from cleaning_specs import CLEANED_DIR, CLEANING_SPECS, DERIVED_SPECS, RAW_DIR
+from data_cleaner import (clean_dataset, clean_dataset_chunked, clean_dataset_incremental, derived_version,
+                          read_data_version, read_raw, save_dataset)
+from profiling import format_steps, profile_step
+
+# Project folder, the scripts of DERIVED_SPECS are relative to it
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Data versions the artifacts of DERIVED_SPECS were last built from: {artifact name: data version}
+BUILT_VERSIONS_PATH = CLEANED_DIR + 'derived_versions.json'
+
+# Profile of every dataset cleaned, one JSON record a line, appended by every run
+PROFILE_PATH = CLEANED_DIR + 'cleaning_profile.jsonl'
+
+
+def source_version(name):
+    """
+    Returns the data version of a dataset, '<spec hash>-<raw file hash>': SHA-256
+    hashes of its cleaning spec and of its raw file's bytes.
+
+    Parameters:
+        name (str): Dataset name, one of CLEANING_SPECS.
+
+    Returns:
+        str: The data version.
+    """
+    spec = CLEANING_SPECS[name]
+    spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+    source_hash = hashlib.sha256()
+    with open(RAW_DIR + spec['source'], 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            source_hash.update(block)
+    return f'{spec_hash[:16]}-{source_hash.hexdigest()}'
+
+
+def clean(name, incremental=False, force=False, report=None):
+    """
+    Cleans one raw OWID file as described by its spec in CLEANING_SPECS and
+    saves the result to CLEANED_DIR, with its conflicts in <name>_conflicts.csv.
+    Datasets whose cleaned file already has the current data version are skipped.
+
+    Parameters:
+        name (str): Dataset name, one of CLEANING_SPECS.
+        incremental (bool): Only clean rows dated after the last cleaned date of
+            their country (falls back to a full clean when the spec changed).
+        force (bool): Clean even when the data version has not changed.
+        report (dict): Filled with 'duplicates' (rows dropped), 'conflicts' (conflicting rows),
+            'steps' (time, rows and peak RSS of every step) and, on a full clean,
+            'parse_failures' (numeric columns holding text).
+
+    Returns:
+        int: Number of rows written (new rows when incremental), or None when skipped.
+    """
+    spec = CLEANING_SPECS[name]
+    source_path = RAW_DIR + spec['source']
+    output_path = CLEANED_DIR + spec['output']
+    columns = {key: spec[key] for key in ('date_columns', 'numeric_columns', 'text_columns')}
+    columns['keys'] = spec.get('keys')
+    keep = spec.get('keep', 'first')
+
+    data_version = source_version(name)
+    cleaned_version = read_data_version(output_path)
+    if not force and cleaned_version == data_version:
+        return None
+
+    if report is None:
+        report = {}
+    rows = None
+
+    # Rows cleaned with another spec have to be cleaned again, so only the raw file may have changed
+    same_spec = cleaned_version is not None and cleaned_version.split('-')[0] == data_version.split('-')[0]
+    if incremental and same_spec:
+        rows = clean_dataset_incremental(source_path, output_path, keep=keep, data_version=data_version,
+                                         report=report, **columns)
+    appended = rows is not None
+
+    if rows is None and spec.get('chunked'):
+        rows = clean_dataset_chunked(source_path, output_path, keep=keep, data_version=data_version, report=report,
+                                     **columns)
+    elif rows is None:
+        with profile_step(report, 'read') as step:
+            raw = read_raw(source_path, spec['date_columns'], spec['numeric_columns'], spec['text_columns'], report)
+            step['rows_out'] = len(raw)
+        cleaned = clean_dataset(raw, keep=keep, report=report, **columns)
+        with profile_step(report, 'save', len(cleaned)):
+            save_dataset(cleaned, output_path, data_version=data_version)
+        rows = len(cleaned)
+
+    # Keep the conflict report next to the cleaned file. A full clean replaces it (removing one left by an
+    # earlier run); an incremental one only saw the new rows, so it adds their conflicts to the report
+    conflicts_path = CLEANED_DIR + f'{name}_conflicts.csv'
+    conflicts = report.get('conflicts', ())
+    if appended:
+        if len(conflicts):
+            conflicts.to_csv(conflicts_path, mode='a', header=not os.path.exists(conflicts_path), index=False)
+    elif len(conflicts):
+        conflicts.to_csv(conflicts_path, index=False)
+    elif os.path.exists(conflicts_path):
+        os.remove(conflicts_path)
+    return rows
+
+
+def timed_clean(name, incremental=False, force=False):
+    """
+    Runs clean() in a worker process and returns (name, rows, seconds, report).
+    """
+    start = time.perf_counter()
+    report = {}
+    rows = clean(name, incremental, force, report)
+    seconds = time.perf_counter() - start
+    return name, rows, seconds, report
+
+
+def derived_order():
+    """
+    Returns the artifacts of DERIVED_SPECS in build order, every artifact after
+    the artifacts it is built from (graphlib.CycleError if they form a cycle).
+    """
+    graph = {name: spec['inputs'] for name, spec in DERIVED_SPECS.items()}
+    return [name for name in TopologicalSorter(graph).static_order() if name in DERIVED_SPECS]
+
+
+def current_versions():
+    """
+    Returns the data version of every node of the DAG: for datasets the version
+    of their cleaned file, for artifacts the version they have when built from
+    the current inputs (None while an input has none, e.g. was never cleaned).
+    """
+    versions = {name: read_data_version(CLEANED_DIR + spec['output']) for name, spec in CLEANING_SPECS.items()}
+    for name in derived_order():
+        versions[name] = derived_version([versions.get(node) for node in DERIVED_SPECS[name]['inputs']])
+    return versions
+
+
+def build_derived(force=False):
+    """
+    Rebuilds the artifacts of DERIVED_SPECS whose inputs changed since they were
+    last built (see BUILT_VERSIONS_PATH), in dependency order.
+
+    Parameters:
+        force (bool): Rebuild every artifact, even when its inputs have not changed.
+
+    Returns:
+        list: Names of the artifacts rebuilt.
+    """
+    versions = current_versions()
+    built = {}
+    if os.path.exists(BUILT_VERSIONS_PATH):
+        with open(BUILT_VERSIONS_PATH) as file:
+            built = json.load(file)
+
+    rebuilt = []
+    for name in derived_order():
+        spec = DERIVED_SPECS[name]
+        if versions[name] is None:
+            waiting = [node for node in spec['inputs'] if versions.get(node) is None]
+            print(f"{name:<28}{'not built':>17}, waiting for {waiting}")
+            continue
+        if not force and built.get(name) == versions[name]:
+            continue
+
+        # Matplotlib's Agg backend keeps plt.show() in the scripts from blocking
+        script = os.path.join(PROJECT_DIR, spec['script'])
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script] + spec.get('args', []), cwd=os.path.dirname(script),
+                       env={**os.environ, 'MPLBACKEND': 'Agg'}, check=True)
+        print(f"{name:<28}{'rebuilt':>17}{time.perf_counter() - start:>9.1f} s")
+
+        # Saved after every artifact so a failed build only redoes what is left
+        built[name] = versions[name]
+        with open(BUILT_VERSIONS_PATH, 'w') as file:
+            json.dump(built, file, indent=2)
+        rebuilt.append(name)
+    return rebuilt
+
+
+def clean_all(names=None, max_workers=None, incremental=False, force=False, build=True):
+    """
+    Cleans every dataset in CLEANING_SPECS in a process pool, largest files
+    first, and prints and appends the profile of every clean to PROFILE_PATH.
+
+    Parameters:
+        names (list): Datasets to clean (default: all of CLEANING_SPECS).
+        max_workers (int): Number of worker processes (default: one per CPU).
+        incremental (bool): Only clean rows past each country's last cleaned date.
+        force (bool): Clean datasets whose data version has not changed too.
+        build (bool): Then rebuild the artifacts of DERIVED_SPECS whose inputs changed.
+
+    Returns:
+        dict: {dataset name: (rows, seconds)}, with rows None for skipped datasets.
+    """
+    if names is None:
+        names = list(CLEANING_SPECS)
+    unknown = [name for name in names if name not in CLEANING_SPECS]
+    if unknown:
+        raise ValueError(f"No cleaning spec for {unknown}.")
+    names = sorted(names, key=lambda name: os.path.getsize(RAW_DIR + CLEANING_SPECS[name]['source']),
+                   reverse=True)
+
+    results = {}
+    run = time.strftime('%Y-%m-%dT%H:%M:%S')
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(timed_clean, name, incremental, force) for name in names]
+        for future in as_completed(futures):
+            name, rows, seconds, report = future.result()
+            results[name] = (rows, seconds)
+            if rows is None:
+                print(f"{name:<28}{'unchanged, skipped':>17}{seconds:>9.1f} s")
+                continue
+            print(f"{name:<28}{rows:>12,} rows{seconds:>9.1f} s{rows / max(seconds, 1e-9):>14,.0f} rows/s"
+                  f"{report.get('duplicates', 0):>8,} duplicates")
+            conflicts = len(report.get('conflicts', ()))
+            if conflicts:
+                print(f"  {conflicts} rows share a key but differ, see {name}_conflicts.csv")
+            if report.get('parse_failures'):
+                print(f"  Columns {report['parse_failures']} hold values that are not numbers, read as NaN")
+            print(f"  {format_steps(report.get('steps', []))}")
+
+            # Kept run after run, so a step that got slower or bigger shows up
+            with open(PROFILE_PATH, 'a') as file:
+                file.write(json.dumps({'run': run, 'dataset': name, 'incremental': incremental, 'rows': rows,
+                                       'seconds': seconds, 'steps': report.get('steps', [])}) + '\n')
+    wall_time = time.perf_counter() - start
+
+    total_time = sum(seconds for _, seconds in results.values())
+    cleaned = sum(rows is not None for rows, _ in results.values())
+    print(f"Cleaned {cleaned} of {len(results)} datasets in {wall_time:.1f} s (one after another: {total_time:.1f} s)")
+
+    if build:
+        build_derived()
+    return results
+
+
+if __name__ == '__main__':
+    # Optional dataset names on the command line clean only those datasets;
+    # --incremental only cleans the rows appended since the last run, --force
+    # cleans datasets whose raw file and spec have not changed too, --no-build
+    # skips rebuilding the artifacts built from the cleaned datasets
+    args = sys.argv[1:]
+    names = [arg for arg in args if not arg.startswith('--')]
+    clean_all(names or None, incremental='--incremental' in args, force='--force' in args,
+              build='--no-build' not in args)
@@ -0,0 +1,8 @@
+# clean_excess_mortality_economist.py
+
+from clean_all import clean
+
+# Clean the dataset and save it to a new file (columns to clean are in cleaning_specs.py)
+clean('excess_mortality_economist')
+
+print("Dataset cleaned and saved!")
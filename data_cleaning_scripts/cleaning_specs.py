@@ -0,0 +1,210 @@
+# cleaning_specs.py
+
+# Folders holding the raw OWID files and the cleaned files
+RAW_DIR = 'F:\\PycharmProjects\\Covid_19_Project\\OWID_Covid_Data\\'
+CLEANED_DIR = 'F:\\PycharmProjects\\Covid_19_Project\\cleaned_data\\'
+
+# How every raw OWID file is cleaned: {dataset name: spec}. Each clean_*.py script
+# runs one spec and clean_all.py runs all of them. Names match dataset_manifest.
+#   source, output: raw and cleaned file names
+#   date_columns, numeric_columns, text_columns: passed to clean_dataset
+#   keys: natural key of a row; rows sharing one are duplicates (whole rows are compared without keys)
+#   keep: row kept for a duplicated key, 'first' (default), 'last' or 'most_complete'
+#   chunked: clean with clean_dataset_chunked instead of loading the whole file
+CLEANING_SPECS = {
+    'cases_deaths': {
+        'source': 'cases_deaths.csv',
+        'output': 'cases_deaths_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'new_cases', 'total_cases', 'new_deaths', 'total_deaths',
+            'weekly_cases', 'weekly_deaths', 'weekly_pct_growth_cases', 'weekly_pct_growth_deaths',
+            'biweekly_cases', 'biweekly_deaths', 'biweekly_pct_growth_cases', 'biweekly_pct_growth_deaths',
+            'new_cases_per_million', 'new_deaths_per_million', 'total_cases_per_million', 'total_deaths_per_million',
+            'weekly_cases_per_million', 'weekly_deaths_per_million', 'biweekly_cases_per_million',
+            'biweekly_deaths_per_million', 'total_deaths_per_100k', 'new_deaths_per_100k',
+            'new_cases_7_day_avg_right', 'new_deaths_7_day_avg_right', 'new_cases_per_million_7_day_avg_right',
+            'new_deaths_per_million_7_day_avg_right', 'new_deaths_per_100k_7_day_avg_right', 'cfr',
+            'cfr_100_cases', 'cfr_short_term', 'days_since_100_total_cases', 'days_since_5_total_deaths',
+            'days_since_1_total_cases_per_million', 'days_since_0_1_total_deaths_per_million',
+            'days_since_100_total_cases_and_5m_pop', 'total_deaths_last12m', 'total_deaths_per_100k_last12m',
+            'total_deaths_per_million_last12m'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'government_response': {
+        'source': 'Government_response_policy.csv',
+        'output': 'Government_response_policy_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'c1m_school_closing', 'c2m_workplace_closing', 'c3m_cancel_public_events',
+            'c4m_restrictions_on_gatherings', 'c5m_close_public_transport', 'c6m_stay_at_home_requirements',
+            'c7m_restrictions_on_internal_movement', 'c8ev_international_travel_controls', 'e1_income_support',
+            'e2_debt_contract_relief', 'e3_fiscal_measures', 'e4_international_support',
+            'h1_public_information_campaigns', 'h2_testing_policy', 'h3_contact_tracing',
+            'h4_emergency_investment_in_healthcare', 'h5_investment_in_vaccines', 'h6m_facial_coverings',
+            'h7_vaccination_policy', 'v2a_vaccine_availability__summary',
+            'v2b_vaccine_age_eligibility_availability_age_floor__general_population_summary',
+            'v2c_vaccine_age_eligibility_availability_age_floor__at_risk_summary', 'stringency_index',
+            'containment_health_index', 'v2_vaccine_availability__summary', 'v2_pregnant_people',
+            'stringency_index_nonvax', 'stringency_index_vax', 'stringency_index_weighted_average'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'reproduction_rate': {
+        'source': 'reproduction_rate.csv',
+        'output': 'reproduction_rate_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': ['r', 'ci_95_u', 'ci_95_l', 'ci_65_u', 'ci_65_l', 'days_infectious'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'testing': {
+        'source': 'testing.csv',
+        'output': 'testing_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'total_tests', 'new_tests', 'total_tests_per_thousand', 'new_tests_per_thousand',
+            'new_tests_7day_smoothed', 'new_tests_per_thousand_7day_smoothed'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'hospital': {
+        'source': 'hospital.csv',
+        'output': 'hospital_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'daily_occupancy_icu', 'daily_occupancy_icu_per_1m', 'daily_occupancy_hosp',
+            'daily_occupancy_hosp_per_1m', 'weekly_admissions_icu', 'weekly_admissions_icu_per_1m',
+            'weekly_admissions_hosp', 'weekly_admissions_hosp_per_1m'],
+        'text_columns': ['country', 'country_code'],
+        'keys': ['country', 'date'],
+    },
+    'excess_mortality': {
+        'source': 'excess_mortality.csv',
+        'output': 'excess_mortality_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'time', 'time_unit', 'average_deaths_2015_2019_all_ages', 'p_avg_0_14', 'p_avg_15_64', 'p_avg_65_74',
+            'p_avg_75_84', 'p_avg_85p', 'p_avg_all_ages', 'projected_deaths_since_2020_all_ages', 'p_proj_0_14',
+            'p_proj_15_64', 'p_proj_65_74', 'p_proj_75_84', 'p_proj_85p', 'p_proj_all_ages', 'excess_proj_all_ages',
+            'deaths_since_2020_all_ages', 'deaths_2010_all_ages', 'deaths_2011_all_ages', 'deaths_2012_all_ages',
+            'deaths_2013_all_ages', 'deaths_2014_all_ages', 'deaths_2015_all_ages', 'deaths_2016_all_ages',
+            'deaths_2017_all_ages', 'deaths_2018_all_ages', 'deaths_2019_all_ages', 'deaths_2020_all_ages',
+            'deaths_2021_all_ages', 'deaths_2022_all_ages', 'deaths_2023_all_ages', 'deaths_2024_all_ages',
+            'cum_excess_proj_all_ages', 'cum_proj_deaths_all_ages', 'cum_p_proj_all_ages',
+            'excess_per_million_proj_all_ages', 'cum_excess_per_million_proj_all_ages',
+            'cum_excess_proj_all_ages_last12m', 'cum_excess_per_million_proj_all_ages_last12m'],
+        'text_columns': ['entity'],
+        'keys': ['entity', 'date'],
+    },
+    'excess_mortality_economist': {
+        'source': 'excess_mortality_economist.csv',
+        'output': 'excess_mortality_economist_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'cumulative_estimated_daily_excess_deaths', 'cumulative_estimated_daily_excess_deaths_ci_95_top',
+            'cumulative_estimated_daily_excess_deaths_ci_95_bot', 'cumulative_estimated_daily_excess_deaths_per_100k',
+            'cumulative_estimated_daily_excess_deaths_ci_95_top_per_100k',
+            'cumulative_estimated_daily_excess_deaths_ci_95_bot_per_100k', 'estimated_daily_excess_deaths',
+            'estimated_daily_excess_deaths_ci_95_top', 'estimated_daily_excess_deaths_ci_95_bot',
+            'estimated_daily_excess_deaths_per_100k', 'estimated_daily_excess_deaths_ci_95_top_per_100k',
+            'estimated_daily_excess_deaths_ci_95_bot_per_100k', 'cumulative_estimated_daily_excess_deaths_last12m',
+            'cumulative_estimated_daily_excess_deaths_per_100k_last12m',
+            'cumulative_estimated_daily_excess_deaths_ci_95_bot_last12m',
+            'cumulative_estimated_daily_excess_deaths_ci_95_bot_per_100k_last12m',
+            'cumulative_estimated_daily_excess_deaths_ci_95_top_last12m',
+            'cumulative_estimated_daily_excess_deaths_ci_95_top_per_100k_last12m'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'google_mobility': {
+        'source': 'google_mobility.csv',
+        'output': 'google_mobility_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': ['trend'],
+        'text_columns': ['country', 'place'],
+        'keys': ['country', 'date', 'place'],
+        # The raw file has a row per place and day
+        'chunked': True,
+    },
+    'vaccinations_age': {
+        'source': 'vaccinations_age.csv',
+        'output': 'vaccinations_age_cleaned_new.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'people_vaccinated_per_hundred', 'people_fully_vaccinated_per_hundred',
+            'people_with_booster_per_hundred'],
+        'text_columns': ['country', 'age_group'],
+        'keys': ['country', 'date', 'age_group'],
+    },
+    'vaccinations_us': {
+        'source': 'vaccinations_us.csv',
+        'output': 'vaccinations_us_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'total_vaccinations', 'total_distributed', 'people_vaccinated', 'people_fully_vaccinated_per_hundred',
+            'total_vaccinations_per_hundred', 'people_fully_vaccinated', 'people_vaccinated_per_hundred',
+            'distributed_per_hundred', 'daily_vaccinations_raw', 'daily_vaccinations',
+            'daily_vaccinations_per_million', 'share_doses_used', 'total_boosters', 'total_boosters_per_hundred'],
+        'text_columns': ['state'],
+        'keys': ['state', 'date'],
+    },
+    'vaccinations_manufacturer': {
+        'source': 'vaccinations_manufacturer.csv',
+        'output': 'vaccinations_manufacturer_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': ['total_vaccinations'],
+        'text_columns': ['country', 'vaccine'],
+        'keys': ['country', 'date', 'vaccine'],
+    },
+    'attitudes': {
+        'source': 'Attitudes (YouGov).csv',
+        'output': 'Attitudes_cleaned.parquet',
+        'date_columns': ['date'],
+        'numeric_columns': [
+            'people_vaccinated_per_hundred', 'uncertain_covid_vaccinate_this_week_pct_pop',
+            'unwillingness_covid_vaccinate_this_week_pct_pop', 'willingness_covid_vaccinate_this_week_pct_pop'],
+        'text_columns': ['country'],
+        'keys': ['country', 'date'],
+    },
+    'covax': {
+        'source': 'covax.csv',
+        'output': 'covax_cleaned.parquet',
+        # Left unparsed by the cleaning step; save_dataset still stores 'date' as datetime64
+        'date_columns': None,
+        'numeric_columns': [
+            'year', 'delivered', 'only_donated', 'only_announced', 'delivered_per_gdp', 'only_donated_per_gdp',
+            'only_announced_per_gdp', 'delivered_per_used', 'only_donated_per_used', 'only_announced_per_used',
+            'delivered_per_capita', 'only_donated_per_capita', 'only_announced_per_capita'],
+        'text_columns': ['country'],
+    },
+}
+
+# Artifacts built from the cleaned datasets: {artifact name: spec}. Together with
+# CLEANING_SPECS they form a DAG; clean_all.py rebuilds an artifact only when the
+# data version of one of its inputs changed.
+#   inputs: datasets (names in CLEANING_SPECS) or other artifacts it is built from
+#   script, args: command rebuilding it, run from the script's folder (relative to the project)
+DERIVED_SPECS = {
+    'country_daily': {
+        'inputs': ['cases_deaths', 'government_response', 'testing', 'hospital', 'reproduction_rate',
+                   'excess_mortality'],
+        'script': 'data_cleaning_scripts/build_fact_table.py',
+    },
+    'prophet_cases_model': {
+        'inputs': ['cases_deaths'],
+        'script': 'Ml_Models/forecasting.py',
+        'args': ['cases'],
+    },
+    'prophet_vaccinations_model': {
+        'inputs': ['vaccinations_age'],
+        'script': 'Ml_Models/forecasting.py',
+        'args': ['vaccinations'],
+    },
+    'prophet_mortality_model': {
+        'inputs': ['excess_mortality'],
+        'script': 'Ml_Models/forecasting.py',
+        'args': ['mortality'],
+    },
+}
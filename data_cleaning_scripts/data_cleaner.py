@@ -1,41 +1,860 @@
 # data_cleaner.py
 
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from profiling import profile_step
+
+# Columns the cleaned files are partitioned by, in order of preference
+PARTITION_COLUMNS = ['country', 'entity', 'state']
+
+# Parquet metadata key holding the partition index (read by the DataStore); it also
+# holds the last date of every key, the watermark incremental cleaning starts from
+PARTITION_INDEX_KEY = b'partition_index'
+
+# Parquet metadata key holding the data version: a hash of the raw file and its cleaning spec
+DATA_VERSION_KEY = b'data_version'
 
+# Key columns with a few hundred distinct values, stored as categoricals
+CATEGORY_COLUMNS = ['country', 'entity', 'place', 'age_group', 'vaccine', 'state', 'country_code']
 
-def clean_dataset(df, date_columns=None, numeric_columns=None, text_columns=None):
+# Markers read as missing values, the same as pd.read_csv's defaults
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>',
+             'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def raw_dtypes(date_columns=None, numeric_columns=None, text_columns=None):
+    """
+    Returns the Arrow column types a raw OWID file is read with: numeric
+    columns as float64, date and text columns as strings (clean_dataset parses
+    and standardizes them). Columns not in the spec are left to type inference.
     """
-    Cleans the given dataset by handling missing values, removing duplicates,
-    converting data types, and standardizing text.
+    dtypes = {col: pa.string() for col in (date_columns or []) + (text_columns or [])}
+    dtypes.update({col: pa.float64() for col in numeric_columns or []})
+    return dtypes
+
+
+def read_raw(input_path, date_columns=None, numeric_columns=None, text_columns=None, report=None):
+    """
+    Reads a raw OWID file with the column types of its spec through the Arrow
+    CSV reader, falling back to pd.read_csv (and flagging the columns in report)
+    when a numeric column holds text.
+
+    Parameters:
+        input_path (str): Path of the raw .csv file.
+        date_columns (list): Date columns of the spec.
+        numeric_columns (list): Numeric columns of the spec.
+        text_columns (list): Text columns of the spec.
+        report (dict): Filled with 'parse_failures' (numeric columns holding non-numeric values).
+
+    Returns:
+        pd.DataFrame: The raw dataset.
+    """
+    convert_options = pa_csv.ConvertOptions(column_types=raw_dtypes(date_columns, numeric_columns, text_columns),
+                                            null_values=NA_VALUES, strings_can_be_null=True)
+    failures = []
+    try:
+        table = pa_csv.read_csv(input_path, convert_options=convert_options)
+    except pa.ArrowInvalid:
+        df = pd.read_csv(input_path, dtype={col: str for col in (date_columns or []) + (text_columns or [])})
+        failures = [col for col in numeric_columns or []
+                    if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])]
+    else:
+        # Hand the Arrow buffers over column by column so the file is not held twice
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+    if report is not None:
+        report['parse_failures'] = failures
+    return df
+
+
+def clean_dataset(df, date_columns=None, numeric_columns=None, text_columns=None, keys=None, keep='first',
+                  report=None):
+    """
+    Cleans the given dataset by handling missing values, removing duplicates
+    (by keys when given, else whole rows), converting data types, and
+    standardizing text, one column at a time.
 
     Parameters:
         df (pd.DataFrame): The dataset to clean.
         date_columns (list): List of columns to convert to datetime.
         numeric_columns (list): List of columns to convert to numeric.
         text_columns (list): List of columns to clean and standardize text.
+        keys (list): Columns identifying a row, or None to compare whole rows.
+        keep (str): Row kept for a duplicated key: 'first', 'last', or
+            'most_complete' (fewest gaps, the first of those on a tie).
+        report (dict): Filled with 'duplicates' (rows dropped), 'conflicts'
+            (the raw rows of keys with differing rows, with a 'kept' column) and
+            'steps', the profile of every step (see profiling.profile_step).
 
     Returns:
         pd.DataFrame: The cleaned dataset.
     """
-    # Handle missing values
-    df.fillna(0, inplace=True)
+    # Plan one conversion per column
+    plan = {}
+    for conversion, columns in (('date', date_columns), ('numeric', numeric_columns), ('text', text_columns)):
+        for col in columns or []:
+            plan[col] = conversion
+    missing = [col for col in plan if col not in df.columns] + [col for col in keys or [] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} are not in the dataset.")
+    if keep not in ('first', 'last', 'most_complete'):
+        raise ValueError(f"Unknown keep rule '{keep}'.")
 
-    # Remove duplicates
-    df.drop_duplicates(inplace=True)
+    # Remove duplicates: by key, or comparing whole rows with the text and date columns (the keys) first
+    converted = {}
+    with profile_step(report, 'deduplicate', len(df)) as dedup:
+        if keys:
+            converted = {col: convert_column(df[col], plan.get(col)) for col in keys}
+            drop, conflicts = duplicate_keys(df, pd.DataFrame(converted), keep)
+        else:
+            drop = duplicate_rows(df, sorted(df.columns, key=lambda col: plan.get(col) not in ('text', 'date')))
+            conflicts = df.iloc[:0].assign(kept=pd.Series(dtype=bool))
+        dedup['rows_out'] = len(df) - int(drop.sum())
+    if report is not None:
+        report['duplicates'] = int(drop.sum())
+        report['conflicts'] = conflicts
+    rows = ~drop if drop.any() else None
 
-    # Convert date columns to datetime
-    if date_columns:
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+    # One kind of column at a time, so each kind is a step of the profile in report
+    cleaned = {}
+    for name, conversion in (('dates', 'date'), ('numbers', 'numeric'), ('text', 'text'), ('other columns', None)):
+        columns = [col for col in df.columns if plan.get(col) == conversion]
+        if not columns:
+            continue
+        with profile_step(report, name, dedup['rows_out']) as step:
+            fill_seconds = 0.0
+            for col in columns:
+                if col in converted:
+                    cleaned[col] = converted[col] if rows is None else converted[col][rows]
+                    continue
+                start = time.perf_counter()
+                values = fill_gaps(df[col] if rows is None else df[col][rows], conversion)
+                fill_seconds += time.perf_counter() - start
+                cleaned[col] = parse_column(values, conversion)
+            if conversion != 'text':
+                step['fill_seconds'] = fill_seconds
 
-    # Convert numeric columns to proper format
-    if numeric_columns:
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    cleaned = {col: cleaned[col] for col in df.columns}
+    return pd.DataFrame(cleaned, index=df.index if rows is None else df.index[rows], copy=False)
 
-    # Standardize text columns
-    if text_columns:
-        for col in text_columns:
-            df[col] = df[col].str.strip().str.title()
 
-    return df
+def convert_column(values, conversion):
+    """
+    Fills the gaps of one column with 0 and converts it ('date', 'numeric',
+    'text' or None to leave it as is), as planned by clean_dataset.
+    """
+    return parse_column(fill_gaps(values, conversion), conversion)
+
+
+def fill_gaps(values, conversion):
+    """
+    Fills the gaps of one column with 0, except in text columns.
+    """
+    # Text gaps would become NaN again when standardized
+    if conversion != 'text' and values.hasnans:
+        return values.fillna(0)
+    return values
+
+
+def parse_column(values, conversion):
+    """
+    Converts one filled column to its planned type.
+    """
+    if conversion == 'date':
+        return pd.to_datetime(values, errors='coerce')
+    if conversion == 'numeric':
+        return pd.to_numeric(values, errors='coerce')
+    if conversion == 'text':
+        return standardize_text(values)
+    return values
+
+
+def duplicate_keys(df, key_values, keep='first'):
+    """
+    Marks the rows whose key repeats another row's, keeping one row per key
+    by the keep rule of clean_dataset, and collects the conflicts: the rows
+    of keys whose rows are not all identical.
+
+    Parameters:
+        df (pd.DataFrame): The raw dataset.
+        key_values (pd.DataFrame): Its cleaned key columns.
+        keep (str): 'first', 'last' or 'most_complete'.
+
+    Returns:
+        tuple: (np.ndarray, True for the rows to drop; pd.DataFrame, the conflicting raw rows with a 'kept' column).
+    """
+    key_codes = key_values.groupby(list(key_values.columns), sort=False, dropna=False, observed=True).ngroup()
+    key_codes = key_codes.to_numpy()
+    shared = pd.Series(key_codes).duplicated(keep=False).to_numpy()
+    if not shared.any():
+        return np.zeros(len(df), dtype=bool), df.iloc[:0].assign(kept=pd.Series(dtype=bool))
+
+    # Only rows sharing a key are looked at from here on
+    positions = np.flatnonzero(shared)
+    candidates = df.iloc[positions]
+    candidate_keys = key_codes[positions]
+    if keep == 'most_complete':
+        gaps = candidates.isna().sum(axis=1).to_numpy()
+        order = np.lexsort((positions, gaps, candidate_keys))
+        kept = np.zeros(len(positions), dtype=bool)
+        kept[order[~pd.Series(candidate_keys[order]).duplicated().to_numpy()]] = True
+    else:
+        kept = ~pd.Series(candidate_keys).duplicated(keep=keep).to_numpy()
+
+    drop = np.zeros(len(df), dtype=bool)
+    drop[positions[~kept]] = True
+
+    # A key conflicts when its rows are not all copies of one row
+    distinct = ~duplicate_rows(candidates)
+    distinct_per_key = pd.Series(distinct).groupby(candidate_keys).transform('sum').to_numpy()
+    conflicting = distinct_per_key > 1
+    conflicts = candidates[conflicting].assign(kept=kept[conflicting])
+    return drop, conflicts
+
+
+def duplicate_rows(df, columns=None):
+    """
+    Marks the rows that repeat an earlier row on the given columns, gaps
+    counting as the 0 clean_dataset fills them with.
+
+    Parameters:
+        df (pd.DataFrame): The dataset.
+        columns (list): Columns to compare, in order (default: all columns).
+
+    Returns:
+        np.ndarray: Boolean mask, True for the rows to drop.
+    """
+    rows = np.arange(len(df))
+    row_codes = np.zeros(len(df), dtype='int64')
+    for col in df.columns if columns is None else columns:
+        if not len(rows):
+            break
+        values = df[col] if len(rows) == len(df) else df[col].take(rows)
+        codes, uniques = pd.factorize(values)
+        if (codes < 0).any():
+            zeros = np.flatnonzero(np.asarray(uniques, dtype='object') == 0)
+            codes = np.where(codes < 0, zeros[0] if len(zeros) else len(uniques), codes)
+
+        # Rows with a combination no other row has can no longer be duplicates
+        row_codes = pd.factorize(row_codes * (len(uniques) + 1) + codes)[0]
+        tied = pd.Series(row_codes).duplicated(keep=False).to_numpy()
+        rows, row_codes = rows[tied], row_codes[tied]
+
+    drop = np.zeros(len(df), dtype=bool)
+    drop[rows[pd.Series(row_codes).duplicated().to_numpy()]] = True
+    return drop
+
+
+def standardize_text(values):
+    """
+    Strips and title-cases a text column, cleaning each distinct value once.
+
+    Parameters:
+        values (pd.Series): The text column.
+
+    Returns:
+        pd.Series: The standardized column as a categorical (non-text values become NaN, as with .str).
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = pd.Series(uniques, dtype='object').str.strip().str.title()
+
+    # Values that only differed in spacing or case now share one category; sorted as astype('category') does
+    categories = pd.Index(sorted(cleaned.dropna().unique()))
+    cleaned_codes = categories.get_indexer(cleaned)
+    new_codes = np.where(codes >= 0, cleaned_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories), index=values.index, name=values.name)
+
+
+def save_dataset(df, output_path, partition_by=None, data_version=None):
+    """
+    Saves a cleaned dataset as Parquet with compact dtypes, one row group per
+    country and a partition index in the file metadata (see write_partitioned).
+
+    Parameters:
+        df (pd.DataFrame): The cleaned dataset.
+        output_path (str): Path of the .parquet file to write.
+        partition_by (str): Column to partition by (default: the first of PARTITION_COLUMNS present).
+        data_version (str): Data version stored under DATA_VERSION_KEY (see clean_all.source_version).
+    """
+    # Store the compact dtypes so every loader gets them without converting
+    data = optimize_dtypes(storage_types(df))
+
+    if partition_by is None:
+        partition_by = next((col for col in PARTITION_COLUMNS if col in data.columns), None)
+    if partition_by is None:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        if data_version is not None:
+            table = table.replace_schema_metadata({**table.schema.metadata, DATA_VERSION_KEY: data_version})
+        pq.write_table(table, output_path)
+        return
+    write_partitioned(data, output_path, partition_by, data_version)
+
+
+def storage_types(df):
+    """
+    Returns df with one type per text column and 'date' as datetime64, as
+    every cleaned Parquet file stores them.
+    """
+    # fillna(0) leaves 0s in text columns that had gaps; Parquet needs one type per column
+    fixed = {}
+    for col in df.select_dtypes(include='object').columns:
+        values = df[col]
+        fixed[col] = values.where(values.isna(), values.astype(str))
+
+    # Store dates as datetime64 so loaders never parse date strings (e.g. covax skips date_columns)
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        fixed['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df.assign(**fixed)
+
+
+def write_partitioned(data, output_path, partition_by, data_version=None):
+    """
+    Writes a dataset to Parquet with one row group per value of partition_by
+    and the partition index stored under PARTITION_INDEX_KEY.
+
+    Parameters:
+        data (pd.DataFrame): The dataset to write.
+        output_path (str): Path of the .parquet file to write.
+        partition_by (str): Column holding the partition keys (e.g. 'country').
+        data_version (str): Data version stored under DATA_VERSION_KEY.
+    """
+    sort_columns = [partition_by] + (['date'] if 'date' in data.columns else [])
+    data = data.sort_values(sort_columns, kind='stable').reset_index(drop=True)
+
+    # Rows of one key are contiguous after sorting; find where each key starts
+    keys = data[partition_by].astype(str).to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(keys)]
+    partitions = {keys[start]: [int(start), int(stop), group]
+                  for group, (start, stop) in enumerate(zip(starts, stops))}
+    index = {'column': partition_by, 'partitions': partitions}
+    if 'date' in data.columns:
+        index['last_dates'] = {key: date.isoformat() for key, date in data.groupby(keys)['date'].max().items()
+                               if pd.notna(date)}
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[PARTITION_INDEX_KEY] = json.dumps(index)
+    if data_version is not None:
+        metadata[DATA_VERSION_KEY] = data_version
+    table = table.replace_schema_metadata(metadata)
+
+    with pq.ParquetWriter(output_path, table.schema) as writer:
+        for start, stop in zip(starts, stops):
+            writer.write_table(table.slice(start, stop - start), row_group_size=int(stop - start))
+
+
+def clean_dataset_chunked(input_path, output_path, date_columns=None, numeric_columns=None,
+                          text_columns=None, keys=None, keep='first', partition_by=None, chunksize=100000,
+                          data_version=None, report=None):
+    """
+    Streaming version of clean_dataset followed by save_dataset, for raw files
+    too large to load whole: the CSV is read chunksize rows at a time and every
+    cleaned chunk is appended to the Parquet file. Numeric columns are written
+    as float64.
+
+    Parameters:
+        input_path (str): Path of the raw .csv file.
+        output_path (str): Path of the .parquet file to write.
+        date_columns (list): List of columns to convert to datetime.
+        numeric_columns (list): List of columns to convert to numeric.
+        text_columns (list): List of columns to clean and standardize text.
+        keys (list): Columns identifying a row, or None to compare whole rows.
+        keep (str): Row kept for a duplicated key (see clean_dataset).
+        partition_by (str): Column to partition by (default: the first of PARTITION_COLUMNS present).
+        chunksize (int): Number of raw rows read at a time.
+        data_version (str): Data version stored under DATA_VERSION_KEY.
+        report (dict): Filled with 'duplicates', 'conflicts' and 'steps' as by clean_dataset,
+            the steps of all chunks added up.
+
+    Returns:
+        int: Number of rows written.
+    """
+    columns = {'date_columns': date_columns, 'numeric_columns': numeric_columns, 'text_columns': text_columns}
+    if keep not in ('first', 'last', 'most_complete'):
+        raise ValueError(f"Unknown keep rule '{keep}'.")
+    duplicates = 0
+    seen = np.array([], dtype='uint64')
+    if keys:
+        conversions = {col: conversion for conversion, col_list in
+                       (('date', date_columns), ('numeric', numeric_columns), ('text', text_columns))
+                       for col in col_list or []}
+        with profile_step(report, 'find duplicate keys') as step:
+            kept, shared, key_hashes = duplicate_keys_chunked(input_path, keys, conversions, keep, chunksize)
+            step['rows_out'] = int(kept.sum())
+        # Raw rows of the keys found more than once, with their key hash, for the conflicts report
+        candidates, candidate_keys = [], []
+        offset = 0
+    writer = None
+    index = {'runs': {}, 'last_dates': {}}
+    pending = []
+    rows = 0
+    # Written next to the output and moved in place once complete
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+
+    chunks = iter(pd.read_csv(input_path, chunksize=chunksize))
+    while True:
+        with profile_step(report, 'read') as step:
+            chunk = next(chunks, None)
+            step['rows_out'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            break
+
+        # The steps of every chunk's clean are added up in report
+        chunk_report = {} if report is None else {'steps': report.setdefault('steps', [])}
+        if keys:
+            # Keep the rows the first pass chose; no key repeats within the chunk after that
+            positions = slice(offset, offset + len(chunk))
+            offset += len(chunk)
+            chunk_kept, chunk_shared = kept[positions], shared[positions]
+            candidates.append(chunk[chunk_shared].assign(kept=chunk_kept[chunk_shared]))
+            candidate_keys.append(key_hashes[positions][chunk_shared])
+            duplicates += int((~chunk_kept).sum())
+            chunk = clean_dataset(chunk[chunk_kept], keys=keys, report=chunk_report, **columns)
+        else:
+            with profile_step(report, 'deduplicate across chunks', len(chunk)) as step:
+                # Hash numbers as float64 so a column read as int in one chunk matches the next
+                chunk = chunk.fillna(0)
+                chunk = chunk.astype({col: 'float64' for col in chunk.select_dtypes(include='number').columns})
+                hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+                new_rows = ~pd.Series(hashes).duplicated().to_numpy()
+                if len(seen):
+                    found = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+                    new_rows &= seen[found] != hashes
+                duplicates += int((~new_rows).sum())
+                chunk = chunk[new_rows].copy()
+                seen = np.sort(np.concatenate([seen, hashes[new_rows]]), kind='stable')
+                step['rows_out'] = len(chunk)
+            chunk = clean_dataset(chunk, report=chunk_report, **columns)
+
+        with profile_step(report, 'write', len(chunk)):
+            # Same fixes as save_dataset, with types that stay the same from chunk to chunk
+            fixed = {col: chunk[col].astype('float64') for col in numeric_columns or []}
+            for col in chunk.select_dtypes(include='object').columns:
+                values = chunk[col]
+                fixed[col] = values.where(values.isna(), values.astype(str))
+            if 'date' in chunk.columns and not pd.api.types.is_datetime64_any_dtype(chunk['date']):
+                fixed['date'] = pd.to_datetime(chunk['date'], errors='coerce')
+            chunk = chunk.assign(**fixed)
+
+            if writer is None:
+                if partition_by is None:
+                    partition_by = next((col for col in PARTITION_COLUMNS if col in chunk.columns), None)
+                # Categorical columns get 32-bit codes so later chunks can add categories
+                schema = pa.Table.from_pandas(chunk, preserve_index=False).schema
+                for i, field in enumerate(schema):
+                    if field.name in CATEGORY_COLUMNS:
+                        schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), pa.string())))
+                    elif pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(tmp_path, schema)
+
+            if partition_by is None:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+                continue
+
+            # Split the chunk into runs of one key; a run continuing the last key waits with it
+            parts = chunk[partition_by].astype(str).to_numpy()
+            starts = np.flatnonzero(np.r_[True, parts[1:] != parts[:-1]]) if len(parts) else np.array([], dtype=int)
+            stops = np.r_[starts[1:], len(parts)]
+            for start, stop in zip(starts, stops):
+                if pending and parts[start] != pending[0][0]:
+                    rows = write_row_group(writer, schema, pending, index, rows)
+                    pending = []
+                pending.append((parts[start], chunk.iloc[start:stop]))
+
+    with profile_step(report, 'write'):
+        if pending:
+            rows = write_row_group(writer, schema, pending, index, rows)
+        runs = index.pop('runs')
+        if writer is None:
+            # No chunk was read: write the header's columns so loaders still find the file
+            empty = clean_dataset(pd.read_csv(input_path, nrows=0), keys=keys, **columns)
+            save_dataset(empty, output_path, partition_by=partition_by, data_version=data_version)
+        elif partition_by is not None and any(len(key_runs) > 1 for key_runs in runs.values()):
+            writer.close()
+            merge_runs(tmp_path, output_path, schema, runs, index, partition_by, data_version)
+            os.remove(tmp_path)
+        else:
+            if partition_by is not None:
+                index = {'partitions': {key: key_runs[0] for key, key_runs in runs.items()}, **index,
+                         'column': partition_by}
+                writer.add_key_value_metadata({PARTITION_INDEX_KEY: json.dumps(index)})
+            if data_version is not None:
+                writer.add_key_value_metadata({DATA_VERSION_KEY: data_version})
+            writer.close()
+            os.replace(tmp_path, output_path)
+    if report is not None:
+        report['duplicates'] = duplicates
+        report['conflicts'] = pd.DataFrame(columns=['kept'])
+        if keys and candidates:
+            report['conflicts'] = conflicting_rows(pd.concat(candidates), np.concatenate(candidate_keys))
+    return rows
+
+
+def duplicate_keys_chunked(input_path, keys, conversions, keep='first', chunksize=100000):
+    """
+    Applies the keep rule of clean_dataset to the cleaned keys of a whole raw
+    file, reading chunksize rows at a time (only the key columns, unless keep
+    is 'most_complete').
+
+    Parameters:
+        input_path (str): Path of the raw .csv file.
+        keys (list): Columns identifying a row.
+        conversions (dict): {column: 'date', 'numeric' or 'text'}, as planned by clean_dataset.
+        keep (str): 'first', 'last' or 'most_complete'.
+        chunksize (int): Number of raw rows read at a time.
+
+    Returns:
+        tuple: (np.ndarray, True for the rows kept; np.ndarray, True for the rows
+        whose key repeats; np.ndarray, the 64-bit hash of every row's key).
+    """
+    hashes, gaps = [], []
+    usecols = None if keep == 'most_complete' else keys
+    for chunk in pd.read_csv(input_path, chunksize=chunksize, usecols=usecols):
+        key_values = pd.DataFrame({col: convert_column(chunk[col], conversions.get(col)) for col in keys})
+        hashes.append(pd.util.hash_pandas_object(key_values[keys], index=False).to_numpy())
+        if keep == 'most_complete':
+            gaps.append(chunk.isna().sum(axis=1).to_numpy())
+    hashes = np.concatenate(hashes) if hashes else np.array([], dtype='uint64')
+
+    shared = pd.Series(hashes).duplicated(keep=False).to_numpy()
+    if keep == 'most_complete':
+        order = np.lexsort((np.arange(len(hashes)), np.concatenate(gaps), hashes))
+        kept = np.zeros(len(hashes), dtype=bool)
+        kept[order[~pd.Series(hashes[order]).duplicated().to_numpy()]] = True
+    else:
+        kept = ~pd.Series(hashes).duplicated(keep=keep).to_numpy()
+    return kept, shared, hashes
+
+
+def conflicting_rows(candidates, candidate_keys):
+    """
+    Returns the raw rows (with their 'kept' column) of the keys whose rows
+    are not all copies of one row, as in the conflicts report of clean_dataset.
+    """
+    distinct = ~duplicate_rows(candidates.drop(columns='kept'))
+    distinct_per_key = pd.Series(distinct).groupby(candidate_keys).transform('sum').to_numpy()
+    return candidates[distinct_per_key > 1]
+
+
+def write_row_group(writer, schema, pending, index, rows):
+    """
+    Writes the buffered rows of one run of a partition key as a row group,
+    sorted by date, and records its row range, row group and last date in
+    index ({'runs': {key: [[first row, end row, row group], ...]}, 'last_dates': {key: date}}).
+
+    Returns:
+        int: Number of rows written so far, including this group.
+    """
+    key = pending[0][0]
+    runs = index['runs']
+    data = pd.concat([part for _, part in pending])
+    if 'date' in data.columns:
+        data = data.sort_values('date', kind='stable')
+    writer.write_table(pa.Table.from_pandas(data, schema=schema, preserve_index=False),
+                       row_group_size=max(len(data), 1))
+    runs.setdefault(key, []).append([rows, rows + len(data), sum(len(key_runs) for key_runs in runs.values())])
+    if 'date' in data.columns and pd.notna(data['date'].max()):
+        last_date = data['date'].max().isoformat()
+        index['last_dates'][key] = max(last_date, index['last_dates'].get(key, last_date))
+    return rows + len(data)
+
+
+def merge_runs(input_path, output_path, schema, runs, index, partition_by, data_version=None):
+    """
+    Rewrites a Parquet file written by clean_dataset_chunked whose partition
+    keys came in several runs with one row group per key, sorted by date, and
+    writes the partition index. Only one key's rows are held in memory at a time.
+
+    Parameters:
+        input_path (str): Path of the file with one row group per run.
+        output_path (str): Path of the .parquet file to write.
+        schema (pa.Schema): Schema of both files.
+        runs (dict): {key: [[first row, end row, row group], ...]} of the input file, keys in output order.
+        index (dict): Partition index to complete ('last_dates' already filled in).
+        partition_by (str): Column holding the partition keys.
+        data_version (str): Data version stored under DATA_VERSION_KEY.
+    """
+    source = pq.ParquetFile(input_path)
+    partitions = {}
+    rows = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for group, (key, key_runs) in enumerate(runs.items()):
+            # Each row group has its own dictionary for the categorical columns
+            table = source.read_row_groups([run[2] for run in key_runs]).unify_dictionaries().combine_chunks()
+            if 'date' in table.column_names:
+                table = table.sort_by('date')
+            writer.write_table(table.cast(schema), row_group_size=max(table.num_rows, 1))
+            partitions[key] = [rows, rows + table.num_rows, group]
+            rows += table.num_rows
+
+        writer.add_key_value_metadata(
+            {PARTITION_INDEX_KEY: json.dumps({'partitions': partitions, **index, 'column': partition_by})})
+        if data_version is not None:
+            writer.add_key_value_metadata({DATA_VERSION_KEY: data_version})
+
+
+def read_file_metadata(output_path):
+    """
+    Returns the key-value metadata of a cleaned Parquet file, or {} when the file does not exist.
+    """
+    if not os.path.exists(output_path):
+        return {}
+    # The footer has the schema metadata too, and is where clean_dataset_chunked writes its own
+    return pq.read_metadata(output_path).metadata or {}
+
+
+def read_partition_index(output_path):
+    """
+    Returns the partition index of a cleaned Parquet file ({'column', 'partitions',
+    'last_dates'}), or None when the file does not exist or is not partitioned.
+    """
+    metadata = read_file_metadata(output_path)
+    if PARTITION_INDEX_KEY not in metadata:
+        return None
+    return json.loads(metadata[PARTITION_INDEX_KEY])
+
+
+def read_data_version(output_path):
+    """
+    Returns the data version of a cleaned Parquet file, or None when the file
+    does not exist or was saved without one.
+    """
+    data_version = read_file_metadata(output_path).get(DATA_VERSION_KEY)
+    return data_version.decode() if data_version is not None else None
+
+
+def derived_version(input_versions):
+    """
+    Returns the data version of an artifact built from other datasets (e.g.
+    the fact table): a SHA-256 hash of their data versions, in order, or None
+    if any of them has none.
+    """
+    if not all(input_versions):
+        return None
+    return hashlib.sha256(' '.join(input_versions).encode()).hexdigest()
+
+
+def clean_dataset_incremental(input_path, output_path, date_columns=None, numeric_columns=None,
+                              text_columns=None, keys=None, keep='first', chunksize=100000,
+                              data_version=None, report=None):
+    """
+    Cleans only the raw rows dated after the last date already cleaned for
+    their country and adds them to the cleaned file (see add_to_partitions).
+    Rows revised before that date need a full clean.
+
+    Parameters:
+        input_path (str): Path of the raw .csv file.
+        output_path (str): Path of the cleaned .parquet file to update.
+        date_columns (list): List of columns to convert to datetime.
+        numeric_columns (list): List of columns to convert to numeric.
+        text_columns (list): List of columns to clean and standardize text.
+        keys (list): Columns identifying a row, or None to compare whole rows.
+        keep (str): Row kept for a duplicated key (see clean_dataset).
+        chunksize (int): Number of raw rows read at a time.
+        data_version (str): Data version stored under DATA_VERSION_KEY.
+        report (dict): Filled with 'duplicates', 'conflicts' and 'steps' for the new rows, as by clean_dataset.
+
+    Returns:
+        int: Number of new rows, or None when the cleaned file has no watermark
+        and needs a full clean.
+    """
+    index = read_partition_index(output_path)
+    if index is None or 'last_dates' not in index:
+        return None
+    key_column = index['column']
+    last_dates = pd.Series(index['last_dates'], dtype='object').map(pd.Timestamp)
+
+    # Keep raw rows past their country's watermark; countries without one are new
+    with profile_step(report, 'read new rows') as step:
+        new_rows = []
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            parts = chunk[key_column]
+            if key_column in (text_columns or []):
+                parts = parts.str.strip().str.title()
+            dates = pd.to_datetime(chunk['date'], errors='coerce')
+            watermark = pd.to_datetime(parts.map(last_dates))
+            new_rows.append(chunk[watermark.isna() | (dates > watermark)])
+        # A raw file without data rows has no chunks; its header still gets the version stamped below
+        new_data = pd.concat(new_rows, ignore_index=True) if new_rows else pd.read_csv(input_path, nrows=0)
+        step['rows_out'] = len(new_data)
+
+    cleaned = clean_dataset(new_data, date_columns=date_columns, numeric_columns=numeric_columns,
+                            text_columns=text_columns, keys=keys, keep=keep, report=report)
+    with profile_step(report, 'save', len(cleaned)):
+        if not add_to_partitions(output_path, cleaned, data_version):
+            # The new rows need wider column types than the file has: save the whole dataset again
+            existing = pd.read_parquet(output_path)
+            save_dataset(pd.concat([existing, cleaned], ignore_index=True), output_path, partition_by=key_column,
+                         data_version=data_version)
+    return len(cleaned)
+
+
+def add_to_partitions(output_path, new_rows, data_version=None):
+    """
+    Adds cleaned rows to the row groups of their countries in a partitioned
+    cleaned file, one row group at a time.
+
+    Parameters:
+        output_path (str): Path of the cleaned .parquet file (with a partition index).
+        new_rows (pd.DataFrame): Cleaned rows to add, possibly none.
+        data_version (str): Data version stored under DATA_VERSION_KEY.
+
+    Returns:
+        bool: False (and the file untouched) when the new rows do not fit the file's column types.
+    """
+    source = pq.ParquetFile(output_path)
+    index = read_partition_index(output_path)
+    key_column = index['column']
+    schema = source.schema_arrow.remove_metadata()
+    new_data = storage_types(new_rows)[schema.names]
+    try:
+        added = pa.Table.from_pandas(new_data, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return False
+    if not keeps_values(added, new_data):
+        return False
+
+    # Row positions of the new rows of every key
+    keys = new_rows[key_column].astype(str).to_numpy()
+    positions = pd.Series(np.arange(len(keys))).groupby(keys).indices
+    last_dates = dict(index.get('last_dates', {}))
+    if 'date' in new_rows.columns:
+        last_dates.update({key: date.isoformat() for key, date in new_rows.groupby(keys)['date'].max().items()
+                           if pd.notna(date)})
+
+    existing = sorted(index['partitions'].items(), key=lambda item: item[1][2])
+    groups = [(key, bounds[2]) for key, bounds in existing] + [(key, None) for key in sorted(positions)
+                                                                  if key not in index['partitions']]
+    partitions = {}
+    rows = 0
+    # The index and version go in the footer once every row group is written, as in clean_dataset_chunked
+    metadata = {key: value for key, value in (source.schema_arrow.metadata or {}).items()
+                if key not in (PARTITION_INDEX_KEY, DATA_VERSION_KEY)}
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    with pq.ParquetWriter(tmp_path, schema.with_metadata(metadata)) as writer:
+        for key, group in groups:
+            tables = [] if group is None else [source.read_row_group(group)]
+            if key in positions:
+                tables.append(added.take(positions[key]))
+                table = pa.concat_tables(tables).unify_dictionaries().combine_chunks()
+                if 'date' in table.column_names:
+                    table = table.sort_by('date')
+            else:
+                table = tables[0]
+            writer.write_table(table, row_group_size=max(table.num_rows, 1))
+            partitions[key] = [rows, rows + table.num_rows, len(partitions)]
+            rows += table.num_rows
+
+        writer.add_key_value_metadata({PARTITION_INDEX_KEY: json.dumps(
+            {'column': key_column, 'partitions': partitions, 'last_dates': last_dates})})
+        if data_version is not None:
+            writer.add_key_value_metadata({DATA_VERSION_KEY: data_version})
+    os.replace(tmp_path, output_path)
+    return True
+
+
+def keeps_values(table, df):
+    """
+    Returns True when every numeric column of a table converted from df to a
+    file's column types holds df's values: integer columns without gaps, float
+    columns to the 6 significant digits downcast_numeric keeps.
+    """
+    for field in table.schema:
+        if not (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)):
+            continue
+        column = table.column(field.name)
+        if pa.types.is_integer(field.type) and column.null_count:
+            return False
+        stored = column.to_numpy(zero_copy_only=False).astype('float64')
+        if not np.allclose(stored, df[field.name].to_numpy(dtype='float64'), rtol=1e-6, atol=0, equal_nan=True):
+            return False
+    return True
+
+
+def build_fact_table(sources, keys=('country', 'date')):
+    """
+    Outer-joins cleaned datasets that hold one row per (country, date) into a
+    single wide fact table, with a has_<source> flag per dataset marking the
+    rows that dataset contributed.
+
+    Parameters:
+        sources (dict): {dataset name: cleaned DataFrame}, each with one row per key.
+        keys (tuple): Columns to join on.
+
+    Returns:
+        pd.DataFrame: The fact table, sorted by the keys.
+    """
+    keys = list(keys)
+    fact = None
+    for name, df in sources.items():
+        values = [col for col in df.columns if col not in keys]
+        if fact is not None:
+            collisions = sorted(set(values).intersection(fact.columns))
+            if collisions:
+                raise ValueError(f"Columns {collisions} of '{name}' already come from another dataset.")
+
+        # Plain string keys so datasets with different country categories join cleanly
+        part = df.assign(**{key: df[key].astype(str) for key in keys if key != 'date'})
+        part[f'has_{name}'] = True
+        if fact is None:
+            fact = part
+        else:
+            # validate raises if a dataset has more than one row per key
+            fact = pd.merge(fact, part, on=keys, how='outer', validate='one_to_one')
+
+    flags = {f'has_{name}': fact[f'has_{name}'].fillna(False).astype(bool) for name in sources}
+    return fact.assign(**flags).sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def optimize_dtypes(df, category_columns=None):
+    """
+    Applies the compact dtype plan: categoricals for key columns, and for every
+    numeric column the smallest type that still holds its values (see downcast_numeric).
+
+    Parameters:
+        df (pd.DataFrame): The dataset to convert.
+        category_columns (list): Key columns to store as categoricals (default: CATEGORY_COLUMNS).
+
+    Returns:
+        pd.DataFrame: The dataset with compact dtypes.
+    """
+    if category_columns is None:
+        category_columns = CATEGORY_COLUMNS
+
+    compact = {}
+    for col in df.columns:
+        values = df[col]
+        if col in category_columns:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                compact[col] = values.astype('category')
+        elif pd.api.types.is_float_dtype(values.dtype) or pd.api.types.is_integer_dtype(values.dtype):
+            compact[col] = downcast_numeric(values)
+
+    return df.assign(**compact)
+
+
+def downcast_numeric(values):
+    """
+    Returns a numeric column in the smallest dtype that represents it exactly
+    (integers) or to 6 significant digits (floats).
+    """
+    array = values.to_numpy(dtype='float64')
+    if not np.isnan(array).any() and np.array_equal(array, np.round(array)):
+        return pd.to_numeric(values, downcast='integer')
+
+    as_float32 = array.astype('float32')
+    if np.allclose(as_float32, array, rtol=1e-6, atol=0, equal_nan=True):
+        return values.astype('float32')
+    return values.astype('float64')
@@ -0,0 +1,105 @@
+# profiling.py
+
+import sys
+import time
+from contextlib import contextmanager
+
+# Fields of a step record added up when a step runs more than once (e.g. once per chunk)
+SUMMED_FIELDS = ['seconds', 'fill_seconds', 'rows_in', 'rows_out']
+
+
+def reset_peak_rss():
+    """
+    Starts a new peak RSS measurement where the OS allows it (Linux). Elsewhere
+    peak_rss_mb keeps returning the peak of the whole process.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MiB (since the last
+    reset_peak_rss on Linux), or None where it cannot be read (Windows
+    without psutil).
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, KiB everywhere else
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return peak / 2**20 if peak is not None else None
+
+
+@contextmanager
+def profile_step(report, step, rows_in=None):
+    """
+    Profiles one step of a clean. Yields the step's record, on which the step
+    sets 'rows_out' (and 'fill_seconds' if it fills gaps); once the step ends,
+    its wall time and peak RSS are added and the record is appended to
+    report['steps']. A step run more than once is merged into one record:
+    times and rows are summed and the peak is the highest.
+
+    Parameters:
+        report (dict): Report of the clean, or None to profile nothing.
+        step (str): Name of the step (e.g. 'read', 'deduplicate', 'numbers').
+        rows_in (int): Rows the step starts from (None for reads).
+    """
+    record = {'step': step, 'rows_in': rows_in, 'rows_out': rows_in}
+    if report is None:
+        yield record
+        return
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    yield record
+    record['seconds'] = time.perf_counter() - start
+    record['peak_rss_mb'] = peak_rss_mb()
+
+    steps = report.setdefault('steps', [])
+    earlier = next((earlier for earlier in steps if earlier['step'] == step), None)
+    if earlier is None:
+        steps.append(record)
+        return
+    for field in SUMMED_FIELDS:
+        if record.get(field) is not None:
+            earlier[field] = (earlier.get(field) or 0) + record[field]
+    if record['peak_rss_mb'] is not None:
+        earlier['peak_rss_mb'] = max(earlier['peak_rss_mb'] or 0, record['peak_rss_mb'])
+
+
+def format_steps(steps):
+    """
+    Returns a one-line summary of a clean's steps, e.g.
+    'read 1.2 s | deduplicate 0.3 s | numbers 0.8 s (fill 0.2 s) | peak 395 MiB'.
+    """
+    parts = []
+    for record in steps:
+        part = f"{record['step']} {record['seconds']:.2f} s"
+        if record.get('fill_seconds'):
+            part += f" (fill {record['fill_seconds']:.2f} s)"
+        parts.append(part)
+    peaks = [record['peak_rss_mb'] for record in steps if record.get('peak_rss_mb') is not None]
+    if peaks:
+        parts.append(f"peak {max(peaks):.0f} MiB")
+    return ' | '.join(parts)
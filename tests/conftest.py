@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The scripts import each other by module name, as when run from their own folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'Analysis_Scripts'), os.path.join(ROOT, 'data_cleaning_scripts')]
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import (clean_dataset, clean_dataset_chunked, clean_dataset_incremental, read_data_version,
+                          read_partition_index, save_dataset)
+
+SPEC = {'date_columns': ['date'], 'numeric_columns': ['value', 'other'], 'text_columns': ['country'],
+        'keys': ['country', 'date']}
+
+# Keys repeated across 2-row chunks: ' a' matches 'a' once cleaned, 'b' repeats with a gap (a conflict)
+# and 'c' repeats as an exact copy
+RAW = pd.DataFrame({
+    'country': ['a', 'a', 'b', 'b', ' a', 'c', 'b', 'a', 'c'],
+    'date': ['2021-01-01', '2021-01-02', '2021-01-01', '2021-01-02', '2021-01-01', '2021-01-01', '2021-01-02',
+             '2021-01-03', '2021-01-01'],
+    'value': [1, 2, 3, 4, 9, 5, 4, np.nan, 5],
+    'other': [1, np.nan, 1, 1, 1, 1, np.nan, 2, 1],
+})
+
+
+@pytest.mark.parametrize('keep', ['first', 'last', 'most_complete'])
+def test_chunked_clean_matches_clean_dataset(tmp_path, keep):
+    raw_path = str(tmp_path / 'raw.csv')
+    RAW.to_csv(raw_path, index=False)
+
+    single_report, chunked_report = {}, {}
+    single_path, chunked_path = str(tmp_path / 'single.parquet'), str(tmp_path / 'chunked.parquet')
+    save_dataset(clean_dataset(pd.read_csv(raw_path), keep=keep, report=single_report, **SPEC), single_path)
+    clean_dataset_chunked(raw_path, chunked_path, keep=keep, chunksize=2, report=chunked_report, **SPEC)
+
+    # The chunked clean writes numbers as float64, save_dataset downcasts them
+    pd.testing.assert_frame_equal(pd.read_parquet(chunked_path), pd.read_parquet(single_path), check_dtype=False)
+    assert read_partition_index(chunked_path) == read_partition_index(single_path)
+    assert chunked_report['duplicates'] == single_report['duplicates'] == 3
+    pd.testing.assert_frame_equal(chunked_report['conflicts'], single_report['conflicts'])
+
+
+# One row per key, new dates for 'a' and 'b' and a new country 'c' after the first clean
+DAILY = pd.DataFrame({
+    'country': ['a'] * 4 + ['b'] * 4 + ['c'] * 2,
+    'date': ['2021-01-01', '2021-01-02', '2021-01-03', '2021-01-04'] * 2 + ['2021-01-03', '2021-01-04'],
+    'value': [0.5, 1.5, 2.5, 3.5, 10.25, 11.25, 12.25, 13.25, 7.75, 8.75],
+    'other': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+})
+
+
+def first_clean(tmp_path, raw):
+    """
+    Saves the clean of the rows up to 2021-01-02 and writes the whole raw file, returning their paths.
+    """
+    raw_path, output_path = str(tmp_path / 'raw.csv'), str(tmp_path / 'cleaned.parquet')
+    old = raw[raw['date'] <= '2021-01-02']
+    save_dataset(clean_dataset(old.copy(), **SPEC), output_path, data_version='v1')
+    raw.to_csv(raw_path, index=False)
+    return raw_path, output_path
+
+
+@pytest.mark.parametrize('raw', [DAILY, DAILY.assign(value=DAILY['value'].where(DAILY['date'] < '2021-01-04', 1e40))],
+                         ids=['new rows', 'new rows too large for float32'])
+def test_incremental_clean_matches_full_clean(tmp_path, raw):
+    raw_path, output_path = first_clean(tmp_path, raw)
+    assert clean_dataset_incremental(raw_path, output_path, data_version='v2', **SPEC) == 6
+
+    full_path = str(tmp_path / 'full.parquet')
+    save_dataset(clean_dataset(raw.copy(), **SPEC), full_path)
+    assert read_partition_index(output_path) == read_partition_index(full_path)
+    pd.testing.assert_frame_equal(pd.read_parquet(output_path), pd.read_parquet(full_path))
+    assert read_data_version(output_path) == 'v2'
+
+
+def test_incremental_clean_of_a_header_only_file(tmp_path):
+    raw_path, output_path = first_clean(tmp_path, DAILY)
+    DAILY.iloc[:0].to_csv(raw_path, index=False)
+    index = read_partition_index(output_path)
+
+    assert clean_dataset_incremental(raw_path, output_path, data_version='v2', **SPEC) == 0
+    assert read_partition_index(output_path) == index
+    assert read_data_version(output_path) == 'v2'
@@ -0,0 +1,67 @@
+import pandas as pd
+import plotly.express as px
+import pytest
+from dash import dash_table
+
+from data_store import label_units, normalize, normalized_unit, rollup
+
+# Daily rows from Saturday 2021-01-30 to Tuesday 2021-02-09 for 'A', three days for 'B'
+DAILY = pd.DataFrame({
+    'country': ['A'] * 11 + ['B'] * 3,
+    'date': list(pd.date_range('2021-01-30', '2021-02-09')) + list(pd.date_range('2021-01-30', '2021-02-01')),
+    'new_cases': [float(day) for day in range(1, 12)] + [10.0, 10.0, 10.0],
+})
+DAILY['total_cases'] = DAILY.groupby('country')['new_cases'].cumsum()
+
+
+@pytest.mark.parametrize('interval, expected', [
+    # Weeks start on Monday: Jan 30-31, Feb 1-7 and Feb 8-9 for 'A'
+    ('weekly', {'country': ['A', 'A', 'A', 'B', 'B'],
+                'date': ['2021-01-25', '2021-02-01', '2021-02-08', '2021-01-25', '2021-02-01'],
+                'new_cases': [1 + 2, 3 + 4 + 5 + 6 + 7 + 8 + 9, 10 + 11, 10 + 10, 10],
+                'total_cases': [3, 45, 66, 20, 30]}),
+    ('monthly', {'country': ['A', 'A', 'B', 'B'],
+                 'date': ['2021-01-01', '2021-02-01', '2021-01-01', '2021-02-01'],
+                 'new_cases': [1 + 2, sum(range(3, 12)), 10 + 10, 10],
+                 'total_cases': [3, 66, 20, 30]}),
+])
+def test_rollup_sums_counts_and_keeps_last_totals(interval, expected):
+    expected = pd.DataFrame(expected).assign(date=lambda frame: pd.to_datetime(frame['date']))
+    pd.testing.assert_frame_equal(rollup(DAILY, interval), expected, check_dtype=False)
+
+
+def test_rollup_daily_returns_the_frame():
+    assert rollup(DAILY, 'daily') is DAILY
+
+
+# US vaccinations are keyed by state, with no country to look a population up
+STATES = pd.DataFrame({
+    'state': ['Texas', 'Texas', 'Utah'],
+    'date': pd.to_datetime(['2021-01-01', '2021-01-02', '2021-01-01']),
+    'total_vaccinations': [100.0, 150.0, 20.0],
+    'daily_vaccinations_per_million': [5.0, 6.0, 7.0],
+})
+
+
+def figure_and_table(data):
+    values = [col for col in data.columns if col not in ('country', 'state', 'date')]
+    figure = px.line(data, x='date', y=values, title='Counts per million')
+    table = dash_table.DataTable(columns=[{'name': col, 'id': col} for col in data.columns],
+                                 data=data.to_dict('records'))
+    return figure, table
+
+
+@pytest.mark.parametrize('data, population', [(DAILY, None), (STATES, None), (STATES, 'per_million'),
+                                              (STATES, 'total')])
+def test_normalize_and_label_units_leave_unconverted_frames_alone(data, population):
+    assert normalize(data, population) is data
+    unit = normalized_unit(data, population)
+    assert unit is None
+
+    figure, table = figure_and_table(data)
+    title, traces, columns = figure.layout.title.text, [trace.name for trace in figure.data], list(table.columns)
+    assert label_units(figure, unit) is figure
+    assert label_units(table, unit) is table
+    assert figure.layout.title.text == title
+    assert [trace.name for trace in figure.data] == traces
+    assert table.columns == columns